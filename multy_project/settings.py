@@ -128,6 +128,100 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_URL = '/static/'
 
 
+# Number of MuM_<n> unique IDs each process reserves from the database at a time
+UNIQUE_ID_BLOCK_SIZE = 100
+
+# Country code (digits only) added to phone numbers entered without one
+PHONE_DEFAULT_COUNTRY_CODE = '91'
+
+# Numbers with at most this many digits (after trunk zeros) are treated as national
+PHONE_NATIONAL_NUMBER_LENGTH = 10
+
+# National numbers shorter than this are rejected (defaults to PHONE_NATIONAL_NUMBER_LENGTH)
+PHONE_NATIONAL_NUMBER_MIN_LENGTH = 10
+
+# Rows written per bulk_create batch when importing uploaded contact sheets
+IMPORT_BATCH_SIZE = 1000
+
+
+# WhatsApp Web sending
+
+# Number of logged-in browser sessions (WhatsApp accounts) kept open by the queue
+# worker; each campaign is sharded across all of them and sent in parallel
+WHATSAPP_POOL_SIZE = 1
+
+# Chrome user-data directories, one per session, so the login survives restarts
+WHATSAPP_PROFILE_DIR = BASE_DIR / 'chrome_profiles'
+
+# 'desktop' runs Chrome in a visible window; 'server' runs it headless with a small window,
+# minimal logging, capped renderer processes and images/fonts/media blocked
+WHATSAPP_BROWSER_MODE = 'desktop'
+
+# Server-mode tuning; see DEFAULT_SERVER_BROWSER in multymessenger/browser.py for the blocked URL patterns
+WHATSAPP_SERVER_BROWSER = {
+    'window_size': '1280,800',
+    'renderer_process_limit': 2,
+}
+
+# Pinned browser binaries; when unset, Chrome is looked up in the standard locations and
+# chromedriver on the PATH or in the webdriver-manager cache, without network access
+CHROME_BINARY_PATH = None
+CHROMEDRIVER_PATH = None
+# Allow webdriver-manager to download a chromedriver when no local one is found
+CHROMEDRIVER_ALLOW_DOWNLOAD = False
+
+# Seconds to wait for the QR code to be scanned when a session is not logged in
+WHATSAPP_LOGIN_TIMEOUT = 60
+
+# Dotted path of the class that delivers messages; DryRunBackend simulates sending offline
+WHATSAPP_SEND_BACKEND = 'multymessenger.backends.SeleniumBackend'
+
+# How each chat is opened: 'reload' navigates to the send URL, 'in_page' uses the
+# app's own "New chat" search and falls back to 'reload' when it finds nothing
+WHATSAPP_SEND_MODE = 'reload'
+
+# Per-step timeouts (seconds) of the send loop; each wait returns as soon as the page is ready
+WHATSAPP_TIMEOUTS = {
+    'chat_open': 20,  # Compose box or invalid-number dialog after opening a chat
+    'in_page_open': 5,  # Each step of the in-app chat search before falling back to a reload
+    'send_confirm': 15,  # Sent tick on the new message after pressing Enter
+}
+
+
+# Per-account pacing of the send loop (token bucket with adaptive backoff)
+WHATSAPP_RATE_LIMIT = {
+    'burst': 5,  # Messages that may go out back to back
+    'per_minute': 20,  # Sustained rate while sends succeed
+    'min_per_minute': 2,  # Floor for the automatic backoff
+    'window': 20,  # Recent sends the failure rate is measured over
+    'failure_threshold': 0.3,  # Failed/invalid share of the window that halves the rate
+}
+
+# No messages are sent between these times, e.g. ('21:00', '09:00'); None disables it.
+# The times are read in TIME_ZONE (UTC above), not the server's or recipients' local time.
+WHATSAPP_QUIET_HOURS = None
+
+# Send outcomes are buffered and written back every N results or T seconds
+STATUS_FLUSH_EVERY = 50
+STATUS_FLUSH_INTERVAL = 5
+
+# Days a WhatsApp registration check stays trusted; known-invalid numbers are skipped until then
+NUMBER_VALIDITY_TTL_DAYS = 30
+
+# Numbers another campaign queued or sent within this many days are left out of new campaigns; 0 disables it
+DEDUPE_RECENT_DAYS = 7
+
+# Seconds between progress polls of the campaign Server-Sent Events stream
+PROGRESS_STREAM_INTERVAL = 2
+# The stream ends once the counts have not changed for this many seconds (stalled
+# queue, or rows left 'sending' by a dead browser); reload the page to reopen it
+PROGRESS_STREAM_IDLE_TIMEOUT = 60
+
+
+# Import-time budget for a web process, checked by `manage.py check_import_budget`
+WEB_IMPORT_BUDGET_MS = 1000
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,3 +1,54 @@
 from django.contrib import admin
 
+from .models import Campaign, MultyMessenger, NumberValidity, StatusCount, StepTiming
+from .stats import delete_recipients
+
 # Register your models here.
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'created_at')
+    search_fields = ('name', 'message')
+
+
+@admin.register(MultyMessenger)
+class MultyMessengerAdmin(admin.ModelAdmin):
+    list_display = ('unique_id', 'contact_num', 'f_name', 'l_name', 'campaign', 'message_status', 'contact_num_valid', 'date_sent')
+    list_filter = ('message_status', 'contact_num_valid')
+    search_fields = ('unique_id', 'phone_key', 'f_name', 'l_name')
+    # Statuses only change through `stats.update_statuses`, which keeps `status_count` in step
+    readonly_fields = ('campaign', 'message_status', 'contact_num_valid')
+    # Counting the whole messenger table on every page is too slow for large sends
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        # Recipients are queued from the home page, which counts them per campaign
+        return False
+
+    def delete_model(self, request, obj):
+        delete_recipients(MultyMessenger.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_recipients(queryset)
+
+
+@admin.register(StatusCount)
+class StatusCountAdmin(admin.ModelAdmin):
+    list_display = ('campaign', 'message_status', 'contact_num_valid', 'count')
+    list_filter = ('message_status', 'contact_num_valid')
+    readonly_fields = ('campaign', 'message_status', 'contact_num_valid', 'count')
+
+
+@admin.register(NumberValidity)
+class NumberValidityAdmin(admin.ModelAdmin):
+    list_display = ('phone_key', 'is_valid', 'checked_at')
+    list_filter = ('is_valid',)
+    search_fields = ('phone_key',)
+
+
+@admin.register(StepTiming)
+class StepTimingAdmin(admin.ModelAdmin):
+    list_display = ('campaign', 'step', 'count', 'total_seconds', 'max_seconds', 'updated_at')
+    list_filter = ('step',)
+    readonly_fields = ('campaign', 'step', 'count', 'total_seconds', 'max_seconds', 'buckets', 'updated_at')
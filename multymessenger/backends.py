@@ -0,0 +1,239 @@
+# multymessenger/backends.py
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from selenium.webdriver.common.keys import Keys
+
+import queue
+import random
+import threading
+import time
+
+from .browser import close_driver_pool, get_driver_pool, is_healthy
+from .chromedriver import resolve_chrome_binaries
+from .fakeweb import is_simulated_invalid
+from .navigation import SEND_MODE_RELOAD, open_chat
+from .phones import whatsapp_phone
+from .status import STATUS_INVALID, STATUS_SUCCESS
+from .timing import STEP_ALERT_DISMISS, STEP_CHAT_OPEN, STEP_SEND, timed
+from .waits import CHAT_INVALID, count_outgoing_messages, dismiss_invalid_number_dialog, wait_for_sent_tick
+
+try:
+    import psutil
+except ImportError:  # Only needed to report browser memory
+    psutil = None
+
+DEFAULT_SEND_BACKEND = "multymessenger.backends.SeleniumBackend"
+
+DEFAULT_DRY_RUN = {
+    "sessions": 1,  # Sessions that can send concurrently
+    "latency": 0.05,  # Seconds to "open" a chat
+    "send_latency": 0.05,  # Seconds until a message is "confirmed"
+    "invalid_rate": 0.0,  # Share of numbers that are not on WhatsApp
+    "failure_rate": 0.0,  # Share of sends that are never confirmed
+}
+
+
+class SendBackend:
+    """
+    What the send loop talks to in order to deliver messages.
+
+    A backend hands out sessions (one per sending account, each with a
+    `name`), sends one prefilled message at a time and says whether a session
+    is still usable after an error. Backends time the steps of `send` with
+    `timing.timed`.
+    """
+
+    name = "base"
+
+    @property
+    def size(self):
+        """
+        Number of sessions that can send at the same time.
+        """
+        return 1
+
+    def prepare(self):
+        """
+        Check at worker startup that the backend can send at all; raise if not.
+        """
+
+    def acquire(self):
+        raise NotImplementedError
+
+    def release(self, session, discard=False):
+        raise NotImplementedError
+
+    def send(self, session, contact_num, payload):
+        """
+        Send the URL-encoded `payload` to `contact_num`. Returns STATUS_SUCCESS or
+        STATUS_INVALID and raises when the message could not be sent.
+        """
+        raise NotImplementedError
+
+    def check_number(self, session, contact_num):
+        """
+        Return whether `contact_num` is on WhatsApp, without sending anything.
+        Raises when the check could not be made.
+        """
+        raise NotImplementedError
+
+    def is_healthy(self, session):
+        return True
+
+    def memory_usage(self):
+        """
+        Resident memory in bytes of the processes this backend drives, if known.
+        """
+        return None
+
+    def close(self):
+        pass
+
+
+class SeleniumBackend(SendBackend):
+    """
+    Sends through the pooled, logged-in WhatsApp Web browsers.
+    """
+
+    name = "selenium"
+
+    @property
+    def size(self):
+        return get_driver_pool().size
+
+    def prepare(self):
+        resolve_chrome_binaries()
+
+    def acquire(self):
+        return get_driver_pool().acquire()
+
+    def release(self, session, discard=False):
+        get_driver_pool().release(session, discard=discard)
+
+    def send(self, session, contact_num, payload):
+        driver = session.driver
+        # Open chat with the given phone number; resolves on whichever shows
+        # up first: compose box or "Invalid URL" alert
+        state, element = open_chat(driver, contact_num, payload)
+        if state == CHAT_INVALID:
+            with timed(STEP_ALERT_DISMISS):
+                dismiss_invalid_number_dialog(driver)
+            return STATUS_INVALID
+
+        # Send the prefilled message and wait for its tick instead of sleeping
+        with timed(STEP_SEND):
+            sent_before = count_outgoing_messages(driver)
+            element.send_keys(Keys.ENTER)  # Press Enter to send
+            wait_for_sent_tick(driver, sent_before)
+        return STATUS_SUCCESS
+
+    def check_number(self, session, contact_num):
+        # An empty chat shows the invalid-number dialog just like a send would
+        state, _ = open_chat(session.driver, contact_num, "", mode=SEND_MODE_RELOAD)
+        if state == CHAT_INVALID:
+            with timed(STEP_ALERT_DISMISS):
+                dismiss_invalid_number_dialog(session.driver)
+        return state != CHAT_INVALID
+
+    def is_healthy(self, session):
+        return session.driver is not None and is_healthy(session.driver)
+
+    def memory_usage(self):
+        if psutil is None:
+            return None
+        total = 0
+        for session in get_driver_pool().sessions:
+            if session.driver is None:
+                continue
+            try:
+                # chromedriver plus every Chrome process it launched
+                service = psutil.Process(session.driver.service.process.pid)
+                for process in [service, *service.children(recursive=True)]:
+                    total += process.memory_info().rss
+            except (AttributeError, psutil.Error):
+                continue
+        return total
+
+    def close(self):
+        close_driver_pool()
+
+
+class DryRunSession:
+    def __init__(self, name):
+        self.name = name
+
+
+class DryRunBackend(SendBackend):
+    """
+    Simulated sending with no browser at all, configured by `WHATSAPP_DRY_RUN`.
+    Measures the cost of everything around the browser (queueing, pacing,
+    status write-back) and lets the worker run offline.
+    """
+
+    name = "dry_run"
+
+    def __init__(self, **options):
+        config = {**DEFAULT_DRY_RUN, **getattr(settings, "WHATSAPP_DRY_RUN", {}), **options}
+        self.sessions = config["sessions"]
+        self.latency = config["latency"]
+        self.send_latency = config["send_latency"]
+        self.invalid_rate = config["invalid_rate"]
+        self.failure_rate = config["failure_rate"]
+        self._random = random.Random(config.get("seed"))
+        self._idle = queue.Queue()
+        for slot in range(self.sessions):
+            self._idle.put(DryRunSession(f"dry_run_{slot}"))
+
+    @property
+    def size(self):
+        return self.sessions
+
+    def acquire(self):
+        return self._idle.get()
+
+    def release(self, session, discard=False):
+        self._idle.put(session)
+
+    def send(self, session, contact_num, payload):
+        with timed(STEP_CHAT_OPEN):
+            time.sleep(self.latency)
+        if is_simulated_invalid(whatsapp_phone(contact_num), self.invalid_rate):
+            return STATUS_INVALID
+
+        with timed(STEP_SEND):
+            time.sleep(self.send_latency)
+            if self._random.random() < self.failure_rate:
+                raise TimeoutError("Message was not confirmed as sent.")
+        return STATUS_SUCCESS
+
+    def check_number(self, session, contact_num):
+        with timed(STEP_CHAT_OPEN):
+            time.sleep(self.latency)
+        return not is_simulated_invalid(whatsapp_phone(contact_num), self.invalid_rate)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_send_backend():
+    """
+    Return the process-wide send backend named by `WHATSAPP_SEND_BACKEND`.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(getattr(settings, "WHATSAPP_SEND_BACKEND", DEFAULT_SEND_BACKEND))()
+        return _backend
+
+
+def close_send_backend():
+    """
+    Release whatever the process-wide send backend holds (e.g. the browser pool).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
@@ -0,0 +1,310 @@
+# multymessenger/browser.py
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+from .chromedriver import resolve_chrome_binaries
+from .timing import STEP_DRIVER_START, STEP_LOGIN_WAIT, timed
+
+import logging
+import os
+import queue
+import threading
+
+WHATSAPP_WEB_URL = "https://web.whatsapp.com"
+CHAT_LIST_XPATH = '//*[@id="pane-side"]'
+
+BROWSER_MODE_DESKTOP = "desktop"
+BROWSER_MODE_SERVER = "server"
+
+DEFAULT_SERVER_BROWSER = {
+    "window_size": "1280,800",  # Small fixed viewport; WhatsApp Web still uses its wide layout
+    "renderer_process_limit": 2,  # Cap on Chrome renderer processes per browser
+    # Requests dropped before they hit the network: images, fonts and media
+    "blocked_urls": [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf",
+        "*.mp3", "*.mp4", "*.ogg", "*.opus", "*.webm",
+        "*://mmg.whatsapp.net/*",  # Media attachments
+        "*://pps.whatsapp.net/*",  # Profile pictures
+    ],
+}
+# Seconds between refreshes of the saved QR code while a headless session waits for login
+QR_SCREENSHOT_INTERVAL = 5
+
+
+def get_whatsapp_url():
+    """
+    Return the WhatsApp Web base URL (`WHATSAPP_WEB_URL`), overridable to point at a local stand-in.
+    """
+    return getattr(settings, "WHATSAPP_WEB_URL", WHATSAPP_WEB_URL)
+
+
+def get_browser_mode():
+    """
+    Return how Chrome is run: `desktop` (visible window) or `server` (headless, trimmed).
+    """
+    return getattr(settings, "WHATSAPP_BROWSER_MODE", BROWSER_MODE_DESKTOP)
+
+
+def get_server_browser_config():
+    """
+    Return the server-mode browser settings, filled in with the defaults.
+    """
+    return {**DEFAULT_SERVER_BROWSER, **getattr(settings, "WHATSAPP_SERVER_BROWSER", {})}
+
+
+def chrome_options(profile_dir=None, mode=None):
+    """
+    Build the Chrome options for a browser mode.
+    When `profile_dir` is given, Chrome keeps its user data (and so the
+    WhatsApp Web login) in that directory between launches.
+    """
+    mode = mode or get_browser_mode()
+    options = Options()
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-popup-blocking")
+    options.add_argument("--no-sandbox")  # Needed for some Linux environments
+    options.add_argument("--disable-dev-shm-usage")
+    # options.add_argument("--remote-debugging-port=9222")
+    options.add_argument("--disable-gpu")
+
+    if mode == BROWSER_MODE_SERVER:
+        config = get_server_browser_config()
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={config['window_size']}")
+        options.add_argument(f"--renderer-process-limit={config['renderer_process_limit']}")
+        options.add_argument("--log-level=3")  # Errors only
+        options.add_argument("--mute-audio")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    else:
+        options.add_argument("--start-maximized")
+        options.add_argument("--enable-logging")
+        options.add_argument("--v=1")
+
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    return options
+
+
+def block_resources(driver, patterns):
+    """
+    Drop requests matching `patterns` inside the browser, so images, fonts and
+    media are never downloaded, decoded or kept in memory.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def initialize_webdriver(profile_dir=None, mode=None):
+    """
+    Initialize the Selenium WebDriver with Chrome options for the configured browser mode.
+    """
+    mode = mode or get_browser_mode()
+    options = chrome_options(profile_dir, mode)
+    # Resolved once per process; no network access or filesystem scan per launch
+    binaries = resolve_chrome_binaries()
+    options.binary_location = binaries.chrome_path
+
+    try:
+        service = Service(binaries.driver_path)
+        driver = webdriver.Chrome(service=service, options=options)
+    except Exception as e:
+        logging.error(f"Failed to initialize WebDriver: {e}")
+        raise
+
+    if mode == BROWSER_MODE_SERVER:
+        # WhatsApp Web refuses a "HeadlessChrome" user agent with an "update your browser" page
+        user_agent = driver.execute_script("return navigator.userAgent")
+        driver.execute_cdp_cmd(
+            "Network.setUserAgentOverride", {"userAgent": user_agent.replace("HeadlessChrome", "Chrome")}
+        )
+        block_resources(driver, get_server_browser_config()["blocked_urls"])
+    return driver
+
+
+def is_logged_in(driver):
+    """
+    Return True if the chat list of WhatsApp Web is currently rendered.
+    """
+    return bool(driver.find_elements(By.XPATH, CHAT_LIST_XPATH))
+
+
+def ensure_logged_in(driver, timeout=60, qr_screenshot=None):
+    """
+    Make sure the session is logged in to WhatsApp Web, waiting for a QR scan if needed.
+    A headless browser has no window to scan from, so with `qr_screenshot` the
+    page is saved to that path and refreshed until the login completes.
+    """
+    whatsapp_url = get_whatsapp_url()
+    if driver.current_url.startswith(whatsapp_url) and is_logged_in(driver):
+        return
+
+    driver.get(whatsapp_url)
+
+    if qr_screenshot:
+        logging.info(f"Please scan the QR Code saved at {qr_screenshot} to log in to WhatsApp.")
+
+        def logged_in_or_save_qr(driver):
+            if is_logged_in(driver):
+                return True
+            driver.save_screenshot(qr_screenshot)
+            return False
+
+        WebDriverWait(driver, timeout, poll_frequency=QR_SCREENSHOT_INTERVAL).until(logged_in_or_save_qr)
+        if os.path.exists(qr_screenshot):
+            os.remove(qr_screenshot)
+    else:
+        logging.info("Please scan the QR Code in the browser to log in to WhatsApp.")
+
+        # Wait for QR code scanning (returns immediately when the profile is already logged in)
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.XPATH, CHAT_LIST_XPATH))
+        )
+    logging.info("WhatsApp Web successfully logged in.")
+
+
+def is_healthy(driver):
+    """
+    Check that the browser behind a driver is still alive and responsive.
+    """
+    try:
+        driver.execute_script("return document.readyState")
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+class DriverSession:
+    """
+    A logged-in browser owned by the pool, bound to one persistent Chrome profile.
+    """
+
+    def __init__(self, name, profile_dir):
+        self.name = name
+        self.profile_dir = profile_dir
+        self.driver = None
+
+    def start(self, login_timeout):
+        if self.driver is None:
+            with timed(STEP_DRIVER_START):
+                self.driver = initialize_webdriver(self.profile_dir)
+        qr_screenshot = None
+        if self.profile_dir and get_browser_mode() == BROWSER_MODE_SERVER:
+            qr_screenshot = os.path.join(self.profile_dir, "login_qr.png")
+        with timed(STEP_LOGIN_WAIT):
+            ensure_logged_in(self.driver, timeout=login_timeout, qr_screenshot=qr_screenshot)
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.warning(f"Error while quitting WebDriver session {self.name}: {e}")
+        self.driver = None
+
+
+class DriverPool:
+    """
+    Long-lived pool of logged-in WhatsApp Web sessions.
+
+    Each slot uses its own Chrome user-data directory so the login survives
+    browser restarts. Sessions are health-checked on checkout and relaunched
+    when the browser has died.
+    """
+
+    def __init__(self, size=1, profile_root=None, login_timeout=60):
+        self.size = size
+        self.profile_root = profile_root
+        self.login_timeout = login_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._sessions = []
+
+        for slot in range(size):
+            name = f"session_{slot}"
+            profile_dir = os.path.join(profile_root, name) if profile_root else None
+            session = DriverSession(name, profile_dir)
+            self._sessions.append(session)
+            self._idle.put(session)
+
+    @property
+    def sessions(self):
+        return list(self._sessions)
+
+    def acquire(self, timeout=None):
+        """
+        Check out a healthy, logged-in session. Blocks while all sessions are busy.
+        """
+        try:
+            session = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No WhatsApp Web session became available.")
+
+        try:
+            if session.driver is not None and not is_healthy(session.driver):
+                logging.warning(f"WebDriver session {session.name} is unresponsive, relaunching.")
+                session.quit()
+            session.start(self.login_timeout)
+        except Exception:
+            session.quit()
+            self._idle.put(session)
+            raise
+        return session
+
+    def release(self, session, discard=False):
+        """
+        Return a session to the pool. Discarded sessions are relaunched on next checkout.
+        """
+        if discard or (session.driver is not None and not is_healthy(session.driver)):
+            session.quit()
+        self._idle.put(session)
+
+    def close(self):
+        """
+        Quit every browser owned by the pool.
+        """
+        with self._lock:
+            for session in self._sessions:
+                session.quit()
+        logging.info("WebDriver pool closed.")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """
+    Return the process-wide driver pool, creating it from settings on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=getattr(settings, "WHATSAPP_POOL_SIZE", 1),
+                profile_root=getattr(settings, "WHATSAPP_PROFILE_DIR", None),
+                login_timeout=getattr(settings, "WHATSAPP_LOGIN_TIMEOUT", 60),
+            )
+        return _pool
+
+
+def close_driver_pool():
+    """
+    Shut down the process-wide driver pool, if one was created.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,69 @@
+# multymessenger/campaigns.py
+
+from django.db.models import Q, Sum
+
+import logging
+
+from .models import Campaign, MultyMessenger
+from .stats import status_totals, update_statuses
+
+
+def campaign_progress(campaign_id):
+    """
+    Return the number of recipients of a campaign in each message status,
+    read from the aggregate counters rather than the messenger table.
+    """
+    progress = {status: 0 for status, _ in MultyMessenger.STATUS_CHOICES}
+    for (message_status, _), total in status_totals(campaign_id).items():
+        progress[message_status] += total
+    return progress
+
+
+def resume_campaign(campaign_id, retry_failed=True, release_claimed=False, retry_unconfirmed=False):
+    """
+    Put an interrupted campaign back in the queue without re-sending anything.
+
+    Rows already sent are left alone and pending rows are still queued. With
+    `retry_failed`, rows that failed for a transient reason go back to pending.
+    Numbers WhatsApp reported as invalid are not retried. With
+    `release_claimed`, rows a killed worker had claimed but not attempted go
+    back to pending; only use it when no worker is running. With
+    `retry_unconfirmed`, rows left `sending` by a killed worker are requeued
+    too, although some of them may already have been delivered. Returns the
+    number of rows that will be sent by the queue worker.
+    """
+    campaign = Campaign.objects.get(id=campaign_id)
+
+    retried = released = unconfirmed = 0
+    if retry_failed:
+        failed = campaign.recipients.filter(message_status="failed", contact_num_valid="yes")
+        retried = update_statuses(failed.values_list("id", flat=True), "pending", "yes")
+    if release_claimed:
+        claimed = campaign.recipients.filter(message_status="queued")
+        released = update_statuses(claimed.values_list("id", flat=True), "pending", current_status="queued")
+    if retry_unconfirmed:
+        sending = campaign.recipients.filter(message_status="sending")
+        unconfirmed = update_statuses(sending.values_list("id", flat=True), "pending", current_status="sending")
+
+    queued = campaign_progress(campaign.id)["pending"]
+    logging.info(
+        f"Resumed campaign {campaign.id}: {retried} failed, {released} claimed and "
+        f"{unconfirmed} unconfirmed row(s) requeued, {queued} pending."
+    )
+    return queued
+
+
+def recent_campaigns(limit=10):
+    """
+    Return the latest campaigns annotated with per-status recipient counts.
+    Rows left `sending` are counted as `unconfirmed`, apart from the pending ones.
+    """
+    def total(*statuses):
+        return Sum("status_counts__count", filter=Q(status_counts__message_status__in=statuses), default=0)
+
+    return (
+        Campaign.objects.order_by("-id")
+        .annotate(
+            sent=total("sent"), pending=total("pending", "queued"), unconfirmed=total("sending"), failed=total("failed"),
+        )[:limit]
+    )
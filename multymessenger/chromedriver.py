@@ -0,0 +1,148 @@
+# multymessenger/chromedriver.py
+
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+
+ChromeBinaries = namedtuple("ChromeBinaries", ["driver_path", "chrome_path", "version"])
+
+CHROME_PATHS = {
+    "windows": [
+        os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
+        os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
+    ],
+    "darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+    "linux": [
+        "/usr/bin/google-chrome",
+        "/usr/bin/chromium-browser",  # For Chromium
+        "/usr/bin/chromium",
+        "/opt/google/chrome/chrome",
+    ],
+}
+CHROME_COMMANDS = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+DRIVER_NAME = "chromedriver.exe" if platform.system().lower() == "windows" else "chromedriver"
+# Where webdriver-manager leaves the drivers it downloaded on earlier runs
+WDM_CACHE_DIR = Path.home() / ".wdm"
+VERSION_PATTERN = re.compile(r"(\d+)\.\d+\.\d+(?:\.\d+)?")
+
+
+def _executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _version(path):
+    """
+    Return the version reported by `path --version`, e.g. "126.0.6478.126", or None.
+    """
+    try:
+        output = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def _major(version):
+    return version.split(".")[0] if version else None
+
+
+def find_chrome():
+    """
+    Return the Chrome executable: `CHROME_BINARY_PATH`, a standard install location or the PATH.
+    """
+    configured = getattr(settings, "CHROME_BINARY_PATH", None)
+    if configured:
+        return configured if _executable(configured) else None
+    for path in CHROME_PATHS.get(platform.system().lower(), []):
+        if _executable(path):
+            return path
+    for command in CHROME_COMMANDS:
+        path = shutil.which(command)
+        if path:
+            return path
+    return None
+
+
+def _cached_drivers():
+    """
+    Chromedrivers already downloaded into the webdriver-manager cache, newest first.
+    """
+    if not WDM_CACHE_DIR.is_dir():
+        return []
+    drivers = [path for path in WDM_CACHE_DIR.rglob(DRIVER_NAME) if _executable(str(path))]
+    return [str(path) for path in sorted(drivers, key=lambda path: path.stat().st_mtime, reverse=True)]
+
+
+def find_chromedriver(chrome_version=None):
+    """
+    Return a local chromedriver, without touching the network. Tries
+    `CHROMEDRIVER_PATH`, the PATH, then the webdriver-manager cache, preferring
+    a driver whose major version matches Chrome's.
+    """
+    configured = getattr(settings, "CHROMEDRIVER_PATH", None)
+    if configured:
+        return configured if _executable(configured) else None
+
+    candidates = [path for path in [shutil.which(DRIVER_NAME)] if path] + _cached_drivers()
+    if not candidates:
+        return None
+    for path in candidates:
+        if _major(_version(path)) == _major(chrome_version):
+            return path
+    return candidates[0]
+
+
+def _download_chromedriver():
+    # Opt-in only: this is the network call the resolver exists to avoid
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+@lru_cache(maxsize=None)
+def resolve_chrome_binaries():
+    """
+    Pin the chromedriver/Chrome pair used for every browser this process launches.
+
+    Runs once per process; later calls return the memoised result. Raises
+    ImproperlyConfigured straight away if no usable pair is found instead of
+    failing on the first send. Downloading a driver is only attempted when
+    `CHROMEDRIVER_ALLOW_DOWNLOAD` is set.
+    """
+    chrome_path = find_chrome()
+    if not chrome_path:
+        raise ImproperlyConfigured(
+            "Google Chrome was not found. Install it or set CHROME_BINARY_PATH."
+        )
+    chrome_version = _version(chrome_path)
+
+    driver_path = find_chromedriver(chrome_version)
+    if not driver_path and getattr(settings, "CHROMEDRIVER_ALLOW_DOWNLOAD", False):
+        driver_path = _download_chromedriver()
+    if not driver_path:
+        raise ImproperlyConfigured(
+            "No chromedriver found. Put one on the PATH, set CHROMEDRIVER_PATH, "
+            "or set CHROMEDRIVER_ALLOW_DOWNLOAD = True to fetch it once."
+        )
+
+    driver_version = _version(driver_path)
+    if chrome_version and driver_version and _major(chrome_version) != _major(driver_version):
+        raise ImproperlyConfigured(
+            f"chromedriver {driver_version} ({driver_path}) does not match "
+            f"Chrome {chrome_version} ({chrome_path})."
+        )
+
+    logging.info(f"Using Chrome {chrome_version} at {chrome_path} with chromedriver at {driver_path}.")
+    return ChromeBinaries(driver_path, chrome_path, chrome_version)
@@ -0,0 +1,78 @@
+# multymessenger/dedupe.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MultyMessenger
+
+
+def get_recent_days(recent_days=None):
+    """
+    Return the "recently messaged" window in days (`DEDUPE_RECENT_DAYS`); 0 disables it.
+    """
+    if recent_days is None:
+        recent_days = getattr(settings, "DEDUPE_RECENT_DAYS", 7)
+    return recent_days or 0
+
+
+def recently_messaged(phone_keys, days):
+    """
+    Return the subset of `phone_keys` that were queued or sent by any campaign in
+    the last `days` days, with one `IN (...)` query on the indexed `phone_key`.
+    """
+    if not phone_keys or not days:
+        return set()
+    cutoff = timezone.now() - timedelta(days=days)
+    return set(
+        MultyMessenger.objects.filter(
+            phone_key__in=list(phone_keys), campaign__isnull=False, date_sent__gte=cutoff,
+        )
+        .exclude(message_status="failed")
+        .values_list("phone_key", flat=True)
+    )
+
+
+class RecipientDeduper:
+    """
+    One-pass duplicate filter for a campaign's recipient list.
+
+    Keeps a hash set of the normalised numbers already accepted for the
+    campaign, so a number repeated in the same sheet or form is only queued
+    once. Numbers another campaign messaged within the recent window are
+    dropped too; that check costs one query per chunk, not per number.
+    """
+
+    def __init__(self, campaign=None, recent_days=None):
+        self.recent_days = get_recent_days(recent_days) if campaign is not None else 0
+        self.seen = set()
+        if campaign is not None and campaign.pk:
+            self.seen.update(campaign.recipients.values_list("phone_key", flat=True))
+        self.duplicates = 0
+        self.recent = 0
+
+    @property
+    def skipped(self):
+        return self.duplicates + self.recent
+
+    def filter(self, chunk):
+        """
+        Return the `(contact_num, f_name, l_name)` tuples of `chunk` that should be queued.
+        """
+        candidates = {contact[0] for contact in chunk} - self.seen
+        recent = recently_messaged(candidates, self.recent_days)
+
+        kept = []
+        for contact in chunk:
+            contact_num = contact[0]
+            if contact_num in self.seen:
+                self.duplicates += 1
+                continue
+            # Remember recent numbers too, so later repeats count as duplicates
+            self.seen.add(contact_num)
+            if contact_num in recent:
+                self.recent += 1
+                continue
+            kept.append(contact)
+        return kept
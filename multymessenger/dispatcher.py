@@ -0,0 +1,132 @@
+# multymessenger/dispatcher.py
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.db import connections, transaction
+
+from .backends import get_send_backend
+from .models import MultyMessenger
+from .ratelimit import in_quiet_hours
+from .sender import send_whatsapp_message
+from .stats import update_statuses
+from .templating import compile_template, render_payloads
+from .validity import skip_known_invalid
+
+
+def claim_pending_batch(limit=100):
+    """
+    Claim the oldest pending rows that belong to a campaign by moving them to
+    `queued`, and return them. Rows another worker is claiming at the same time
+    are skipped rather than waited for, so concurrent workers never share a row.
+    Rows created by a bare file upload have no campaign and are skipped.
+    The (message_status, id) index returns the rows already in queue order, so
+    no poll sorts the whole pending set.
+    """
+    with transaction.atomic():
+        row_ids = list(
+            MultyMessenger.objects.select_for_update(skip_locked=True)
+            .filter(message_status="pending", campaign__isnull=False)
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+        update_statuses(row_ids, "queued", current_status="pending")
+    return list(
+        MultyMessenger.objects.filter(id__in=row_ids, message_status="queued")
+        .select_related("campaign")
+        .order_by("id")
+    )
+
+
+def release_claims(rows):
+    """
+    Put claimed rows that were never attempted back in the queue.
+    """
+    return update_statuses([row.id for row in rows], "pending", current_status="queued")
+
+
+def group_by_campaign(rows):
+    """
+    Group pending rows by campaign, keeping queue order.
+    Each group can be handed to the sender in a single WhatsApp session.
+    """
+    groups = OrderedDict()
+    for row in rows:
+        groups.setdefault(row.campaign, []).append(row)
+    return groups
+
+
+def shard_recipients(recipients, shards):
+    """
+    Split `recipients` into at most `shards` round-robin slices, one per session.
+    """
+    slices = [recipients[i::shards] for i in range(max(shards, 1))]
+    return [s for s in slices if s]
+
+
+def _send_shard(recipients, payloads):
+    """
+    Send one slice on its own pooled session (runs in a worker thread).
+    """
+    try:
+        return send_whatsapp_message(recipients, payloads)
+    finally:
+        # Each thread opens its own DB connection; don't leave it dangling
+        connections.close_all()
+
+
+def send_in_parallel(recipients, payloads):
+    """
+    Shard a campaign across every session of the send backend and send the
+    slices concurrently. Each session writes its statuses back as it goes.
+    """
+    slices = shard_recipients(recipients, get_send_backend().size)
+    if len(slices) <= 1:
+        return send_whatsapp_message(recipients, payloads)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+        futures = [executor.submit(_send_shard, s, payloads) for s in slices]
+        errors = []
+        for future in futures:
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # A session that cannot log in leaves its slice for the next poll
+                logging.error(f"WhatsApp session failed, its contacts stay pending: {e}")
+                errors.append(e)
+
+    if errors and len(errors) == len(futures):
+        raise errors[0]
+    return results
+
+
+def dispatch_pending(limit=100):
+    """
+    Send one batch of pending messages and return the number of rows processed.
+    Claimed rows that were not attempted (login failure, dead browser,
+    shutdown, quiet hours) go back to pending when the batch ends. Nothing is
+    claimed, and no browser session is taken, during quiet hours.
+    """
+    if in_quiet_hours():
+        return 0
+
+    rows = claim_pending_batch(limit)
+    if not rows:
+        return 0
+
+    try:
+        for campaign, recipients in group_by_campaign(rows).items():
+            # Numbers already known to be off WhatsApp are failed without opening a chat
+            recipients = skip_known_invalid(recipients, current_status="queued")
+            if not recipients:
+                continue
+            logging.info(f"Dispatching campaign {campaign.id} to {len(recipients)} contact(s).")
+            # Render every personalised message before any browser work starts
+            payloads = render_payloads(compile_template(campaign.message), recipients)
+            send_in_parallel(recipients, payloads)
+    finally:
+        release_claims(rows)
+
+    return len(rows)
@@ -0,0 +1,249 @@
+# multymessenger/fakeweb.py
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import json
+import random
+import threading
+import time
+import zlib
+
+# Just enough of the WhatsApp Web DOM for the locators in `browser` and `waits`:
+# the `#pane-side` chat list, the "New chat" search, the footer compose box,
+# outgoing bubbles with ticks and the invalid-number alert. Chats open from a
+# `send?phone=` URL or from a search result, the two ways `navigation` uses.
+APP_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>WhatsApp (local stand-in)</title></head>
+<body>
+<div id="app">
+    <div id="side">
+        <header><div role="button" title="New chat">New chat</div></header>
+        <div id="pane-side">Chats</div>
+    </div>
+    <div id="new-chat-drawer" hidden>
+        <div contenteditable="true" data-tab="3"></div>
+        <div class="results"></div>
+    </div>
+    <div id="main-container"></div>
+</div>
+<script>
+const TICK_LATENCY_MS = __TICK_LATENCY_MS__;
+const CHAT_HTML =
+    '<div id="main"><div class="messages"></div>' +
+    '<footer><div><div><span><div><div></div><div><div><div></div><div><div>' +
+    '<p contenteditable="true"></p>' +
+    '</div></div></div></div></div></span></div></div></footer></div>';
+
+const container = document.getElementById('main-container');
+const drawer = document.getElementById('new-chat-drawer');
+const searchBox = drawer.querySelector('[data-tab="3"]');
+const searchResults = drawer.querySelector('.results');
+let failsNext = false;
+let searchTimer = null;
+
+function showInvalidAlert() {
+    const alert = document.createElement('div');
+    alert.setAttribute('data-testid', 'alert-popup');
+    alert.innerHTML = '<p>Phone number shared via url is invalid.</p><button>OK</button>';
+    document.getElementById('app').appendChild(alert);
+}
+
+async function lookUpChat(phone) {
+    const response = await fetch('/api/chat?phone=' + encodeURIComponent(phone));
+    return response.json();
+}
+
+function showChat(chat, draft) {
+    failsNext = chat.fails;
+    container.innerHTML = CHAT_HTML;
+    container.querySelector('footer p').textContent = draft;
+}
+
+async function openChat(search) {
+    const params = new URLSearchParams(search);
+    const phone = params.get('phone');
+    container.innerHTML = '';
+    if (!phone) {
+        return;
+    }
+    const chat = await lookUpChat(phone);
+    if (!chat.valid) {
+        showInvalidAlert();
+        return;
+    }
+    showChat(chat, params.get('text') || '');
+}
+
+// Search results show the number formatted, like the real app does
+function formatPhone(digits) {
+    return '+' + digits.slice(0, 2) + ' ' + digits.slice(2, 7) + ' ' + digits.slice(7);
+}
+
+async function searchChats() {
+    const digits = searchBox.textContent.replace(/\\D/g, '');
+    searchResults.innerHTML = '';
+    if (!digits) {
+        return;
+    }
+    const chat = await lookUpChat(digits);
+    if (searchBox.textContent.replace(/\\D/g, '') !== digits) {
+        return;  // The query changed while the lookup ran
+    }
+    if (!chat.valid) {
+        searchResults.innerHTML = '<span>No results found</span>';
+        return;
+    }
+    const row = document.createElement('div');
+    row.setAttribute('role', 'listitem');
+    row.textContent = formatPhone(digits);
+    row.addEventListener('click', function () {
+        drawer.hidden = true;
+        showChat(chat, '');
+    });
+    searchResults.appendChild(row);
+}
+
+function openNewChatDrawer() {
+    searchBox.textContent = '';
+    searchResults.innerHTML = '';
+    drawer.hidden = false;
+    searchBox.focus();
+}
+
+searchBox.addEventListener('input', function () {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(searchChats, 100);
+});
+
+function sendDraft(box) {
+    const text = box.textContent;
+    if (!text.trim()) {
+        return;
+    }
+    const bubble = document.createElement('div');
+    bubble.className = 'message-out';
+    bubble.innerHTML = '<span class="text"></span>';
+    bubble.firstChild.textContent = text;
+    document.querySelector('#main .messages').appendChild(bubble);
+    box.textContent = '';
+    if (!failsNext) {
+        setTimeout(function () {
+            const tick = document.createElement('span');
+            tick.setAttribute('data-icon', 'msg-check');
+            bubble.appendChild(tick);
+        }, TICK_LATENCY_MS);
+    }
+}
+
+document.addEventListener('click', function (event) {
+    if (event.target.matches('[title="New chat"]')) {
+        openNewChatDrawer();
+    } else if (event.target.matches('[data-testid="alert-popup"] button')) {
+        event.target.parentElement.remove();
+    }
+});
+
+document.addEventListener('keydown', function (event) {
+    if (event.key === 'Enter' && event.target.matches('#main footer p')) {
+        event.preventDefault();
+        sendDraft(event.target);
+    } else if (event.key === 'Escape' && event.target === searchBox) {
+        drawer.hidden = true;
+    }
+});
+
+openChat(location.search);
+</script>
+</body>
+</html>
+"""
+
+
+def is_simulated_invalid(phone, invalid_rate):
+    """
+    Decide whether a number is "not on WhatsApp" in simulations.
+    Hash-based, so a given number is always valid or always invalid.
+    """
+    return zlib.crc32(phone.encode()) % 10000 < invalid_rate * 10000
+
+
+class FakeWhatsAppServer:
+    """
+    Local HTTP stand-in for WhatsApp Web, for benchmarking without a phone or network.
+
+    `latency` delays every chat lookup (the network part of opening a chat),
+    `tick_latency` delays the sent tick after Enter, `invalid_rate` is the share
+    of numbers that show the invalid-number alert and `failure_rate` the share
+    of messages that never get a tick.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, tick_latency=0.2,
+                 invalid_rate=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.invalid_rate = invalid_rate
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._page = APP_HTML.replace("__TICK_LATENCY_MS__", str(int(tick_latency * 1000))).encode()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                request = urlparse(self.path)
+                if request.path == "/api/chat":
+                    phone = parse_qs(request.query).get("phone", [""])[0]
+                    self._reply(200, "application/json", json.dumps(server.chat_state(phone)).encode())
+                elif request.path in ("/", "/send"):
+                    self._reply(200, "text/html; charset=utf-8", server._page)
+                else:
+                    self._reply(404, "text/plain", b"Not found")
+
+            def _reply(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    def chat_state(self, phone):
+        """
+        Return what opening a chat with `phone` results in, after the configured latency.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            "valid": not is_simulated_invalid(phone, self.invalid_rate),
+            "fails": self._random.random() < self.failure_rate,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -2,6 +2,7 @@
 
 from django import forms
 from .models import MultyMessenger
+from .phones import normalize_phone_numbers
 
 class MessageForm(forms.ModelForm):
     """
@@ -16,7 +17,7 @@ class MessageForm(forms.ModelForm):
     )
     message = forms.CharField(
         widget=forms.Textarea(attrs={
-            'placeholder': 'Type your message...',
+            'placeholder': 'Type your message... Use {f_name}, {l_name} or {contact_num} to personalise it',
             'rows': 4,
             'class': 'form-control' 
         }),
@@ -52,20 +53,17 @@ class MessageForm(forms.ModelForm):
     def clean_contact_num(self):
         """
         Custom validation for `contact_num`.
-        Splits the input string into a list and validates each number.
+        Splits the input string into a list and normalises all numbers to E.164 in one pass.
         """
         contact_nums = self.cleaned_data['contact_num']
-        contact_nums_list = [num.strip() for num in contact_nums.split(',')]
+        contact_nums_list = [num.strip() for num in contact_nums.split(',') if num.strip()]
 
-        # Define a regex for validating international phone numbers
-        import re
-        phone_regex = re.compile(r'^\+?[1-9]\d{1,14}$')  # E.164 format
+        normalized = normalize_phone_numbers(contact_nums_list)
+        invalid = [num for num, phone in zip(contact_nums_list, normalized) if phone is None]
+        if invalid or not normalized:
+            raise forms.ValidationError(f"Invalid phone number format: {', '.join(invalid) or contact_nums}")
 
-        for num in contact_nums_list:
-            if not phone_regex.match(num):
-                raise forms.ValidationError(f"Invalid phone number format: {num}")
-        
-        return contact_nums_list  # Return the cleaned list of phone numbers
+        return normalized  # Return the cleaned list of phone numbers
 
 
 class ExcelUploadForm(forms.Form):
@@ -0,0 +1,114 @@
+# multymessenger/ids.py
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+
+import threading
+
+from .models import UniqueIdSequence
+
+ID_PREFIX = "MuM"
+FIRST_ID = 100
+
+
+def _reserve_on_own_connection(count, name):
+    """
+    Reserve a block in a short transaction on a connection of its own, so the
+    sequence row is unlocked as soon as the block is taken instead of when the
+    caller's (possibly long) import transaction commits.
+    """
+    own_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    table = own_connection.ops.quote_name(UniqueIdSequence._meta.db_table)
+    try:
+        own_connection.set_autocommit(False)
+        while True:
+            try:
+                with own_connection.cursor() as cursor:
+                    # The UPDATE locks the row until the commit below, so the read is ours alone
+                    cursor.execute(f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s", [count, name])
+                    if cursor.rowcount:
+                        cursor.execute(f"SELECT next_value FROM {table} WHERE name = %s", [name])
+                        start = cursor.fetchone()[0] - count
+                    else:
+                        cursor.execute(
+                            f"INSERT INTO {table} (name, next_value) VALUES (%s, %s)", [name, FIRST_ID + count]
+                        )
+                        start = FIRST_ID
+                own_connection.commit()
+                return range(start, start + count)
+            except IntegrityError:
+                # Another process created the sequence row first; take a block from it
+                own_connection.rollback()
+    finally:
+        own_connection.close()
+
+
+def reserve_id_block(count, name=ID_PREFIX):
+    """
+    Atomically reserve `count` consecutive numbers from the sequence and
+    return them as a range. One locked row read and one update, whatever `count` is.
+
+    Inside a transaction the block is reserved on a separate connection, so
+    concurrent imports are not serialised behind the sequence row. Databases
+    without row locks (SQLite) lock as a whole anyway and reserve in place.
+    """
+    if connection.in_atomic_block and connection.features.has_select_for_update:
+        return _reserve_on_own_connection(count, name)
+
+    with transaction.atomic():
+        sequence, _ = UniqueIdSequence.objects.select_for_update().get_or_create(
+            name=name, defaults={"next_value": FIRST_ID}
+        )
+        start = sequence.next_value
+        sequence.next_value = start + count
+        sequence.save(update_fields=["next_value"])
+    return range(start, start + count)
+
+
+class IdAllocator:
+    """
+    Hands out `MuM_<n>` unique IDs from blocks reserved in the database.
+    Concurrent processes each get their own block, so IDs never collide;
+    numbers left in a block when the process exits are simply skipped.
+    """
+
+    def __init__(self, name=ID_PREFIX, block_size=None):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._block = iter(())
+
+    def _get_block_size(self):
+        return self.block_size or getattr(settings, "UNIQUE_ID_BLOCK_SIZE", 100)
+
+    def allocate(self, count):
+        """
+        Return `count` new unique IDs, reserving from the database only when
+        the in-memory block runs out.
+        """
+        numbers = []
+        with self._lock:
+            numbers.extend(n for _, n in zip(range(count), self._block))
+            missing = count - len(numbers)
+            if missing:
+                block = reserve_id_block(max(missing, self._get_block_size()), self.name)
+                numbers.extend(block[:missing])
+                self._block = iter(block[missing:])
+        return [f"{self.name}_{n}" for n in numbers]
+
+
+_allocator = IdAllocator()
+
+
+def allocate_unique_ids(count):
+    """
+    Return `count` new unique IDs for MultyMessenger rows.
+    """
+    return _allocator.allocate(count)
+
+
+def generate_unique_id():
+    """
+    Return a single new unique ID for a MultyMessenger row.
+    """
+    return _allocator.allocate(1)[0]
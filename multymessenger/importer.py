@@ -0,0 +1,149 @@
+# multymessenger/importer.py
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+import logging
+
+from .dedupe import RecipientDeduper
+from .ids import allocate_unique_ids
+from .models import MultyMessenger
+from .stats import record_created
+
+
+def get_batch_size(batch_size=None):
+    """
+    Return the number of rows written per `bulk_create` batch.
+    """
+    return batch_size or getattr(settings, "IMPORT_BATCH_SIZE", 1000)
+
+
+def chunked(items, size):
+    """
+    Yield successive lists of at most `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_contact_nums(contact_nums, batch_size=None):
+    """
+    Return the subset of normalised `contact_nums` already stored in the
+    messenger table, looked up on the indexed `phone_key` with one `IN (...)`
+    query per batch instead of one query per number.
+    """
+    existing = set()
+    for chunk in chunked(list(contact_nums), get_batch_size(batch_size)):
+        existing.update(
+            MultyMessenger.objects.filter(phone_key__in=chunk)
+            .values_list("phone_key", flat=True)
+        )
+    return existing
+
+
+def fill_known_names(chunk):
+    """
+    Give contacts without a name the name last uploaded for the same number,
+    so campaigns queued from the form can be personalised from an earlier sheet.
+    One indexed `phone_key IN (...)` query per chunk.
+    """
+    unnamed = {contact_num for contact_num, f_name, l_name in chunk if not f_name and not l_name}
+    if not unnamed:
+        return chunk
+    known = {
+        phone_key: (f_name, l_name)
+        for phone_key, f_name, l_name in MultyMessenger.objects.filter(phone_key__in=unnamed)
+        .filter(Q(f_name__gt="") | Q(l_name__gt=""))
+        .order_by("id")
+        .values_list("phone_key", "f_name", "l_name")
+    }
+    return [
+        (contact_num, *known[contact_num]) if contact_num in known and not f_name and not l_name
+        else (contact_num, f_name, l_name)
+        for contact_num, f_name, l_name in chunk
+    ]
+
+
+def _write_chunk(chunk, batch_size, campaign=None):
+    """
+    Insert one chunk of `(contact_num, f_name, l_name)` tuples with `bulk_create`.
+    """
+    unique_ids = allocate_unique_ids(len(chunk))
+    MultyMessenger.objects.bulk_create([
+        MultyMessenger(
+            unique_id=unique_id, contact_num=contact_num, phone_key=contact_num,
+            f_name=f_name, l_name=l_name, campaign=campaign,
+        )
+        for unique_id, (contact_num, f_name, l_name) in zip(unique_ids, chunk)
+    ], batch_size=batch_size)
+    if campaign is not None:
+        record_created(campaign.id, len(chunk))
+
+
+def import_contact_chunks(chunks, skip_existing=True, batch_size=None, campaign=None, recent_days=None):
+    """
+    Save chunks of `(contact_num, f_name, l_name)` tuples as MultyMessenger rows,
+    consuming them one at a time so arbitrarily large sheets can be streamed in.
+
+    A number repeated in the stream is only saved once. With `skip_existing`,
+    numbers already in the table are dropped as well. When a `campaign` is
+    given, the rows are queued as its recipients, unnamed contacts take the
+    name uploaded earlier for their number, and numbers messaged by another
+    campaign within `recent_days` (default `DEDUPE_RECENT_DAYS`) are left out.
+    All chunks are written in a single transaction.
+    Returns `(created_count, skipped_count)`.
+    """
+    batch_size = get_batch_size(batch_size)
+    deduper = RecipientDeduper(campaign, recent_days)
+    created = existing_skipped = 0
+
+    with transaction.atomic():
+        for chunk in chunks:
+            # Duplicates and recently messaged numbers are dropped before any insert
+            chunk = deduper.filter(chunk)
+            if skip_existing:
+                existing = existing_contact_nums({c[0] for c in chunk}, batch_size)
+                unique_chunk = [contact for contact in chunk if contact[0] not in existing]
+                existing_skipped += len(chunk) - len(unique_chunk)
+                chunk = unique_chunk
+            if campaign is not None:
+                chunk = fill_known_names(chunk)
+
+            _write_chunk(chunk, batch_size, campaign)
+            created += len(chunk)
+
+    skipped = deduper.skipped + existing_skipped
+    logging.info(
+        f"Imported {created} contact(s), skipped {deduper.duplicates + existing_skipped} duplicate(s) "
+        f"and {deduper.recent} recently messaged number(s)."
+    )
+    return created, skipped
+
+
+def import_contacts(contacts, skip_existing=True, batch_size=None, campaign=None, recent_days=None):
+    """
+    Save an iterable of `(contact_num, f_name, l_name)` tuples in batches.
+    Returns `(created_count, skipped_count)`.
+    """
+    batch_size = get_batch_size(batch_size)
+    return import_contact_chunks(
+        chunked(list(contacts), batch_size), skip_existing=skip_existing,
+        batch_size=batch_size, campaign=campaign, recent_days=recent_days,
+    )
+
+
+def import_contact_file(file, skip_existing=True, batch_size=None, rejected=None):
+    """
+    Stream an uploaded Excel or CSV contact sheet straight into the database
+    without loading the whole workbook. Rows without a valid phone number are
+    appended to `rejected` as `(row_number, value, reason)` when a list is given.
+    Returns `(created_count, skipped_count)`.
+    """
+    from .spreadsheets import iter_contact_chunks  # Spreadsheet stack is only loaded for uploads
+
+    batch_size = get_batch_size(batch_size)
+    return import_contact_chunks(
+        iter_contact_chunks(file, batch_size, rejected=rejected),
+        skip_existing=skip_existing, batch_size=batch_size,
+    )
@@ -0,0 +1,172 @@
+# multymessenger/management/commands/benchmark_send.py
+
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from multymessenger.browser import BROWSER_MODE_DESKTOP, BROWSER_MODE_SERVER
+from multymessenger.fakeweb import FakeWhatsAppServer
+from multymessenger.navigation import SEND_MODE_IN_PAGE, SEND_MODE_RELOAD
+from multymessenger.ratelimit import SendScheduler
+from multymessenger.status import STATUS_INVALID, STATUS_SUCCESS
+from multymessenger.templating import encode_message
+from multymessenger.timing import get_recorder
+
+BACKENDS = {
+    "selenium": "multymessenger.backends.SeleniumBackend",
+    "dry_run": "multymessenger.backends.DryRunBackend",
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the send backends, chat-opening modes and wait timeouts against a "
+        "local stand-in for WhatsApp Web. Nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend", nargs="+", choices=sorted(BACKENDS), default=["dry_run"],
+            help="Backends to benchmark.",
+        )
+        parser.add_argument(
+            "--mode", nargs="+", choices=[SEND_MODE_RELOAD, SEND_MODE_IN_PAGE],
+            default=[SEND_MODE_RELOAD, SEND_MODE_IN_PAGE],
+            help="Ways of opening chats to compare (Selenium backend only).",
+        )
+        parser.add_argument(
+            "--browser-mode", nargs="+", choices=[BROWSER_MODE_DESKTOP, BROWSER_MODE_SERVER],
+            default=[BROWSER_MODE_SERVER],
+            help="Chrome modes to compare (Selenium backend only).",
+        )
+        parser.add_argument("--messages", type=int, default=50, help="Messages sent per run.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Seconds to open a chat.")
+        parser.add_argument("--tick-latency", type=float, default=0.2, help="Seconds until a sent tick.")
+        parser.add_argument("--invalid-rate", type=float, default=0.15, help="Share of numbers not on WhatsApp.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of sends never confirmed.")
+        parser.add_argument(
+            "--send-timeout", nargs="+", type=float, default=[5],
+            help="Seconds to wait for a tick; each value is a separate run (Selenium backend only).",
+        )
+        parser.add_argument(
+            "--in-page-timeout", nargs="+", type=float, default=[5],
+            help=(
+                "Seconds each step of the in-app chat search waits before falling back to a reload; "
+                "each value is a separate run (in_page mode only)."
+            ),
+        )
+        parser.add_argument(
+            "--paced", action="store_true",
+            help="Apply the configured WHATSAPP_RATE_LIMIT instead of sending flat out.",
+        )
+
+    def handle(self, *args, **options):
+        with FakeWhatsAppServer(
+            latency=options["latency"], tick_latency=options["tick_latency"],
+            invalid_rate=options["invalid_rate"], failure_rate=options["failure_rate"], seed=1,
+        ) as server:
+            self.stdout.write(f"Stand-in WhatsApp Web running at {server.url}")
+            for backend_name in options["backend"]:
+                # The dry-run backend never opens chats, so the browser settings make no difference
+                if backend_name != "selenium":
+                    self.run(server, backend_name, None, None, {}, options)
+                    continue
+                for browser_mode in options["browser_mode"]:
+                    for mode in options["mode"]:
+                        for timeouts in self.wait_timeouts(mode, options):
+                            self.run(server, backend_name, browser_mode, mode, timeouts, options)
+
+    def wait_timeouts(self, mode, options):
+        """
+        Return the `WHATSAPP_TIMEOUTS` variants to compare for a chat-opening mode.
+        """
+        # Reloads never use the in-app search, so its timeout would only repeat runs
+        in_page_timeouts = options["in_page_timeout"] if mode == SEND_MODE_IN_PAGE else [None]
+        return [
+            {"send_confirm": send_timeout, **({"in_page_open": in_page_timeout} if in_page_timeout is not None else {})}
+            for send_timeout in options["send_timeout"]
+            for in_page_timeout in in_page_timeouts
+        ]
+
+    def run(self, server, backend_name, browser_mode, mode, timeouts, options):
+        overrides = {
+            "WHATSAPP_WEB_URL": server.url,
+            "WHATSAPP_POOL_SIZE": 1,
+            "WHATSAPP_PROFILE_DIR": tempfile.mkdtemp(prefix="whatsapp-bench-"),
+            "WHATSAPP_TIMEOUTS": {"chat_open": 10, "in_page_open": 5, "send_confirm": 5, **timeouts},
+            "WHATSAPP_DRY_RUN": {
+                "latency": options["latency"], "send_latency": options["tick_latency"],
+                "invalid_rate": options["invalid_rate"], "failure_rate": options["failure_rate"], "seed": 1,
+            },
+        }
+        if mode:
+            overrides["WHATSAPP_SEND_MODE"] = mode
+        if browser_mode:
+            overrides["WHATSAPP_BROWSER_MODE"] = browser_mode
+
+        waits = " ".join(f"{step}={seconds:g}s" for step, seconds in timeouts.items())
+        label = "/".join(part for part in (backend_name, browser_mode, mode) if part) + (f" ({waits})" if waits else "")
+        recorder = get_recorder()
+        with override_settings(**overrides), recorder.capture() as step_times:
+            backend = import_string(BACKENDS[backend_name])()
+            scheduler = SendScheduler(f"bench-{label}") if options["paced"] else None
+            payload = encode_message("Benchmark message")
+            outcomes = {STATUS_SUCCESS: 0, STATUS_INVALID: 0, "failed": 0}
+            per_message = []
+
+            backend.prepare()
+            try:
+                session = backend.acquire()  # Login/launch time is not part of the send rate
+                started = time.perf_counter()
+                for i in range(options["messages"]):
+                    if scheduler:
+                        scheduler.acquire()
+                    t0 = time.perf_counter()
+                    try:
+                        outcomes[backend.send(session, f"+9190000{i:05d}", payload)] += 1
+                    except Exception:
+                        outcomes["failed"] += 1
+                        if not backend.is_healthy(session):
+                            raise
+                    per_message.append(time.perf_counter() - t0)
+                elapsed = time.perf_counter() - started
+                browser_memory = backend.memory_usage()
+                backend.release(session)
+            finally:
+                backend.close()
+                recorder.discard()  # Benchmark timings stay out of the campaign metrics
+
+        self.report(label, elapsed, per_message, outcomes, step_times, browser_memory)
+
+    def report(self, label, elapsed, per_message, outcomes, step_times, browser_memory):
+        rate = len(per_message) / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        self.stdout.write(
+            f"  {len(per_message)} message(s) in {elapsed:.2f}s: {rate:.1f} messages/minute "
+            f"({outcomes[STATUS_SUCCESS]} sent, {outcomes[STATUS_INVALID]} invalid, {outcomes['failed']} failed)"
+        )
+        for step, times in [("per message", per_message), *sorted(step_times.items())]:
+            if times:
+                self.stdout.write(
+                    f"  {step:<18} p50 {statistics.median(times) * 1000:8.1f} ms   "
+                    f"p95 {percentile(times, 0.95) * 1000:8.1f} ms   max {max(times) * 1000:8.1f} ms"
+                )
+        memory = f"{browser_memory / 2**20:.0f} MB" if browser_memory is not None else "n/a"
+        self.stdout.write(f"  memory: worker peak {peak_rss_bytes() / 2**20:.0f} MB, browser {memory}")
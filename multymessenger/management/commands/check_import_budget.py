@@ -0,0 +1,71 @@
+# multymessenger/management/commands/check_import_budget.py
+
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Worker-only stacks the web tier must never load at startup
+WEB_FORBIDDEN_MODULES = ("selenium", "webdriver_manager", "pandas", "numpy", "openpyxl", "psutil")
+
+# What a web process imports before serving its first request
+WEB_STARTUP_CODE = (
+    "from django.core.asgi import get_asgi_application; get_asgi_application(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into `(module, self_us, cumulative_us)` tuples.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the web tier in a fresh interpreter under `python -X importtime` and fail "
+        "if it loads worker-only libraries or exceeds the import-time budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget-ms", type=float, default=getattr(settings, "WEB_IMPORT_BUDGET_MS", 1000),
+            help="Maximum total import time in milliseconds.",
+        )
+        parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "multy_project.settings")}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", WEB_STARTUP_CODE],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode:
+            raise CommandError(f"Web tier failed to import:\n{result.stderr[-2000:]}")
+
+        entries = parse_importtime(result.stderr)
+        total_ms = sum(self_us for _, self_us, _ in entries) / 1000
+        loaded = {module.split(".")[0] for module, _, _ in entries}
+        forbidden = sorted(loaded.intersection(WEB_FORBIDDEN_MODULES))
+
+        self.stdout.write(f"Web tier imported {len(entries)} module(s) in {total_ms:.0f} ms (budget {options['budget_ms']:.0f} ms).")
+        for module, _, cumulative_us in sorted(entries, key=lambda entry: entry[2], reverse=True)[:options["top"]]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+        problems = []
+        if forbidden:
+            problems.append(f"worker-only modules loaded: {', '.join(forbidden)}")
+        if total_ms > options["budget_ms"]:
+            problems.append(f"import time {total_ms:.0f} ms exceeds the {options['budget_ms']:.0f} ms budget")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Import budget OK."))
@@ -0,0 +1,84 @@
+# multymessenger/management/commands/process_message_queue.py
+
+import logging
+import signal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from multymessenger.backends import close_send_backend, get_send_backend
+from multymessenger.dispatcher import dispatch_pending
+from multymessenger.shutdown import request_stop, stop_requested, wait_or_stop
+from multymessenger.timing import flush_timings
+
+
+class Command(BaseCommand):
+    help = "Drain pending MultyMessenger rows and send them through WhatsApp Web."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="Maximum number of pending rows to pick up per batch.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=5.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Process the queue until it is empty, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        poll_interval = options["poll_interval"]
+
+        signal.signal(signal.SIGTERM, self.handle_sigterm)
+
+        # Fail fast on a missing browser/driver instead of on the first batch
+        try:
+            get_send_backend().prepare()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        self.stdout.write("Message queue worker started.")
+        try:
+            self.run(batch_size, poll_interval, options["once"])
+        finally:
+            # Browsers stay logged in between batches and are only closed on shutdown
+            close_send_backend()
+            flush_timings()
+
+        if stop_requested():
+            self.stdout.write("Stop requested, worker stopped.")
+        else:
+            self.stdout.write("Message queue is empty, worker stopped.")
+
+    def handle_sigterm(self, signum, frame):
+        # Only raise the flag: every send loop finishes the message in hand and
+        # returns, then `run` stops polling and `handle` flushes, releases the
+        # claims and closes the browsers on its normal way out
+        request_stop()
+
+    def run(self, batch_size, poll_interval, once):
+        while True:
+            try:
+                processed = dispatch_pending(limit=batch_size)
+            except Exception as e:
+                # Login failures leave the rows pending, so they are retried on the next poll
+                logging.error(f"Error while dispatching pending messages: {e}")
+                if once:
+                    raise
+                if wait_or_stop(poll_interval):
+                    break
+                continue
+
+            if processed:
+                self.stdout.write(f"Processed {processed} pending message(s).")
+            if stop_requested():
+                break
+            if processed:
+                continue
+
+            if once or wait_or_stop(poll_interval):
+                break
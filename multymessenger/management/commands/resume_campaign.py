@@ -0,0 +1,39 @@
+# multymessenger/management/commands/resume_campaign.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from multymessenger.campaigns import campaign_progress, resume_campaign
+from multymessenger.models import Campaign
+
+
+class Command(BaseCommand):
+    help = "Requeue an interrupted campaign without re-sending messages that already went out."
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign_id", type=int, help="ID of the campaign to resume.")
+        parser.add_argument(
+            "--no-retry-failed", action="store_true",
+            help="Only continue pending rows; leave failed rows as they are.",
+        )
+        parser.add_argument(
+            "--release-claimed", action="store_true",
+            help="Also requeue rows a killed worker had claimed but not sent. Stop all workers first.",
+        )
+        parser.add_argument(
+            "--retry-unconfirmed", action="store_true",
+            help="Also requeue rows a killed worker was sending; some may be delivered twice.",
+        )
+
+    def handle(self, *args, **options):
+        campaign_id = options["campaign_id"]
+        try:
+            queued = resume_campaign(
+                campaign_id, retry_failed=not options["no_retry_failed"],
+                release_claimed=options["release_claimed"], retry_unconfirmed=options["retry_unconfirmed"],
+            )
+        except Campaign.DoesNotExist:
+            raise CommandError(f"Campaign {campaign_id} does not exist.")
+
+        progress = ", ".join(f"{count} {status}" for status, count in campaign_progress(campaign_id).items())
+        self.stdout.write(f"Campaign {campaign_id}: {progress}.")
+        self.stdout.write(f"{queued} message(s) queued; run `process_message_queue` to send them.")
@@ -0,0 +1,121 @@
+# multymessenger/management/commands/validate_numbers.py
+
+import logging
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from multymessenger.backends import close_send_backend, get_send_backend
+from multymessenger.models import MultyMessenger
+from multymessenger.ratelimit import get_scheduler
+from multymessenger.timing import flush_timings
+from multymessenger.validity import get_validity_cache, skip_known_invalid
+
+# Numbers (or rows) read per query, so large queues never have to fit in memory
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Check ahead of sending which pending numbers are registered on WhatsApp."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign", type=int,
+            help="Only check the pending numbers of this campaign.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=500,
+            help="Maximum number of numbers to check in this run.",
+        )
+        parser.add_argument(
+            "--refresh", action="store_true",
+            help="Check numbers again even if the cache already knows them.",
+        )
+
+    def handle(self, *args, **options):
+        pending = MultyMessenger.objects.filter(message_status="pending").exclude(phone_key="")
+        if options["campaign"]:
+            pending = pending.filter(campaign_id=options["campaign"])
+
+        phone_keys = self.numbers_to_check(pending, options["limit"], options["refresh"])
+        self.stdout.write(f"Checking {len(phone_keys)} number(s).")
+        backend = get_send_backend()
+        try:
+            if phone_keys:
+                # Fail fast on a missing browser/driver
+                try:
+                    backend.prepare()
+                except ImproperlyConfigured as e:
+                    raise CommandError(str(e))
+            results = self.check_numbers(backend, phone_keys)
+        finally:
+            close_send_backend()
+            flush_timings()
+        get_validity_cache().record(results)
+
+        # Fail the pending rows of numbers that turned out to be dead
+        failed = self.fail_known_invalid(pending)
+        invalid = sum(1 for is_valid in results.values() if not is_valid)
+        self.stdout.write(
+            f"Checked {len(results)} number(s), {invalid} not on WhatsApp; {failed} pending contact(s) failed."
+        )
+
+    def numbers_to_check(self, pending, limit, refresh):
+        """
+        Return up to `limit` distinct pending numbers the cache does not know yet
+        (or any, with `refresh`), reading them in chunks ordered by phone_key.
+        """
+        cache = get_validity_cache()
+        phone_keys, last_key = [], ""
+        while len(phone_keys) < limit:
+            chunk = list(
+                pending.filter(phone_key__gt=last_key)
+                .order_by("phone_key")
+                .values_list("phone_key", flat=True)
+                .distinct()[:CHUNK_SIZE]
+            )
+            if not chunk:
+                break
+            last_key = chunk[-1]
+            if not refresh:
+                known = cache.lookup(chunk)
+                chunk = [phone_key for phone_key in chunk if phone_key not in known]
+            phone_keys.extend(chunk[:limit - len(phone_keys)])
+        return phone_keys
+
+    def check_numbers(self, backend, phone_keys):
+        """
+        Ask the send backend whether each number is on WhatsApp.
+        """
+        results = {}
+        if not phone_keys:
+            return results
+        session = backend.acquire()
+        scheduler = get_scheduler(session.name)
+        try:
+            for phone_key in phone_keys:
+                # Opening a chat counts against the account's pace like a send
+                scheduler.acquire()
+                try:
+                    results[phone_key] = backend.check_number(session, phone_key)
+                except Exception as e:
+                    logging.error(f"Could not check {phone_key}: {e}")
+                    if not backend.is_healthy(session):
+                        backend.release(session, discard=True)
+                        session = backend.acquire()
+        finally:
+            backend.release(session)
+        return results
+
+    def fail_known_invalid(self, pending):
+        """
+        Fail the pending rows whose numbers are known to be invalid, chunk by chunk.
+        Rows a worker claims in the meantime are left to the worker.
+        """
+        failed, last_id = 0, 0
+        while True:
+            rows = list(pending.filter(id__gt=last_id).order_by("id").only("id", "phone_key")[:CHUNK_SIZE])
+            if not rows:
+                return failed
+            last_id = rows[-1].id
+            failed += len(rows) - len(skip_known_invalid(rows, current_status="pending"))
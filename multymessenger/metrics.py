@@ -0,0 +1,52 @@
+# multymessenger/metrics.py
+
+from itertools import zip_longest
+
+from .stats import status_totals
+from .timing import STEP_BUCKETS, step_summaries
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Send outcomes as stored by `status.status_fields`
+OUTCOMES = {
+    ("sent", "yes"): "sent",
+    ("failed", "no"): "invalid",
+    ("failed", "yes"): "failed",
+    ("pending", "yes"): "pending",
+    ("queued", "yes"): "queued",
+    ("sending", "yes"): "sending",
+}
+
+
+def _sample(name, value, **labels):
+    label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+
+def render_metrics():
+    """
+    Render the step-timing histograms and recipient counts in the Prometheus
+    text format. Everything is read from the database aggregates, so any web
+    process reports what every worker has measured.
+    """
+    lines = [
+        "# HELP multymessenger_step_seconds Time spent in each step of the send pipeline.",
+        "# TYPE multymessenger_step_seconds histogram",
+    ]
+    for summary in step_summaries():
+        step = summary["step"]
+        cumulative = 0
+        for bound, bucket in zip_longest(STEP_BUCKETS + ("+Inf",), summary["buckets"], fillvalue=0):
+            cumulative += bucket
+            lines.append(_sample("multymessenger_step_seconds_bucket", cumulative, step=step, le=bound))
+        lines.append(_sample("multymessenger_step_seconds_sum", summary["total"], step=step))
+        lines.append(_sample("multymessenger_step_seconds_count", summary["count"], step=step))
+
+    lines += [
+        "# HELP multymessenger_recipients Campaign recipients by send outcome.",
+        "# TYPE multymessenger_recipients gauge",
+    ]
+    for key, count in sorted(status_totals().items()):
+        outcome = OUTCOMES.get(key, "_".join(key))
+        lines.append(_sample("multymessenger_recipients", count, outcome=outcome))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:31
+
+# Model fields and indexes that were added to models.py without a migration
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0009_alter_multymessenger_contact_num"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="multymessenger",
+            name="contact_num_valid",
+            field=models.CharField(
+                choices=[("yes", "Yes"), ("no", "No")], default="yes", max_length=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="multymessenger",
+            name="message_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=7,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="multymessenger",
+            index=models.Index(
+                fields=["date_sent"], name="messenger_date_se_4489a0_idx"
+            ),
+        ),
+    ]
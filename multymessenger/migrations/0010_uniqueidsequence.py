@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0010_multymessenger_status_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UniqueIdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=20, unique=True)),
+                ("next_value", models.BigIntegerField(default=100)),
+            ],
+            options={
+                "db_table": "unique_id_sequence",
+            },
+        ),
+    ]
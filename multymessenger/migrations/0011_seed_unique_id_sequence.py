@@ -0,0 +1,32 @@
+# Seeds the unique ID sequence from the highest existing MuM_<n> ID
+
+from django.db import migrations
+
+
+def seed_sequence(apps, schema_editor):
+    MultyMessenger = apps.get_model("multymessenger", "MultyMessenger")
+    UniqueIdSequence = apps.get_model("multymessenger", "UniqueIdSequence")
+
+    highest = 99
+    for unique_id in MultyMessenger.objects.values_list(
+        "unique_id", flat=True
+    ).iterator():
+        try:
+            highest = max(highest, int(unique_id.split("_")[1]))
+        except (IndexError, ValueError):
+            continue
+
+    UniqueIdSequence.objects.update_or_create(
+        name="MuM", defaults={"next_value": highest + 1}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0010_uniqueidsequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:36
+
+import math
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+
+# Frozen copy of `multymessenger.phones` as it stood when this migration was
+# written, so later changes to the live normaliser don't change the backfill
+E164_RE = re.compile(r"\+[1-9]\d{6,14}")
+SEPARATORS_RE = re.compile(r"[\s\-().]")
+INTERNATIONAL_PREFIX_RE = re.compile(r"^(?:\+|00)")
+TRAILING_ZERO_DECIMALS_RE = re.compile(r"\.0+$")
+
+
+def normalize_phone_numbers(values):
+    country_code = getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", None)
+    country_code = str(country_code).lstrip("+") if country_code else None
+    national_number_length = getattr(settings, "PHONE_NATIONAL_NUMBER_LENGTH", 10)
+    min_national_number_length = getattr(
+        settings, "PHONE_NATIONAL_NUMBER_MIN_LENGTH", national_number_length
+    )
+
+    def normalize(value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        phone = TRAILING_ZERO_DECIMALS_RE.sub("", str(value).strip())
+        phone = SEPARATORS_RE.sub("", phone)
+        if not phone:
+            return None
+
+        international = INTERNATIONAL_PREFIX_RE.search(phone) is not None
+        digits = INTERNATIONAL_PREFIX_RE.sub("", phone)
+        if country_code and not international:
+            national_digits = digits.lstrip("0")
+            if len(national_digits) <= national_number_length:
+                if len(national_digits) < min_national_number_length:
+                    return None
+                digits = country_code + national_digits
+
+        normalized = "+" + digits
+        return normalized if E164_RE.fullmatch(normalized) else None
+
+    return [normalize(value) for value in values]
+
+
+def backfill_phone_key(apps, schema_editor):
+    """
+    Fill `phone_key` for existing rows, normalising numbers batch by batch.
+    """
+    MultyMessenger = apps.get_model("multymessenger", "MultyMessenger")
+
+    last_id = 0
+    while True:
+        rows = list(
+            MultyMessenger.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "contact_num")[:BACKFILL_BATCH_SIZE]
+        )
+        if not rows:
+            break
+        phones = normalize_phone_numbers([row.contact_num for row in rows])
+        for row, phone in zip(rows, phones):
+            row.phone_key = phone or ""
+        MultyMessenger.objects.bulk_update(rows, ["phone_key"])
+        last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0011_seed_unique_id_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="multymessenger",
+            name="phone_key",
+            field=models.CharField(blank=True, default="", max_length=16),
+        ),
+        migrations.RunPython(backfill_phone_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="multymessenger",
+            index=models.Index(
+                fields=["phone_key"], name="messenger_phone_k_95c03f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="multymessenger",
+            index=models.Index(
+                fields=["message_status", "phone_key"],
+                name="messenger_message_e40dda_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Rows read and updated per query while assigning campaigns
+BATCH_SIZE = 1000
+
+
+def move_messages_to_campaigns(apps, schema_editor):
+    """
+    Create one campaign per distinct message body and point its rows at it.
+    Rows with an empty message (contacts that were only uploaded) get no campaign.
+    The message column is not indexed, so the rows are walked once in primary
+    key order, in batches, rather than filtered by body once per campaign.
+
+    Rows the old inline sender left pending (or that only got a status column
+    in 0010) may well have been delivered: that sender never wrote results
+    back. They are marked `sending` (unconfirmed), so neither the queue worker
+    nor the Resume button re-sends old blasts; only
+    `resume_campaign --retry-unconfirmed` requeues them.
+    """
+    MultyMessenger = apps.get_model("multymessenger", "MultyMessenger")
+    Campaign = apps.get_model("multymessenger", "Campaign")
+
+    campaigns = {}
+    last_id = 0
+    while True:
+        rows = list(
+            MultyMessenger.objects.filter(id__gt=last_id)
+            .exclude(message="")
+            .order_by("id")
+            .only("id", "message")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        for row in rows:
+            if row.message not in campaigns:
+                campaigns[row.message] = Campaign.objects.create(message=row.message)
+            row.campaign = campaigns[row.message]
+        MultyMessenger.objects.bulk_update(rows, ["campaign"])
+        last_id = rows[-1].id
+
+    MultyMessenger.objects.filter(
+        campaign__isnull=False, message_status="pending"
+    ).update(message_status="sending")
+
+
+def move_messages_to_recipients(apps, schema_editor):
+    """
+    Copy each campaign's message back onto its recipient rows.
+    """
+    Campaign = apps.get_model("multymessenger", "Campaign")
+
+    for campaign in Campaign.objects.all().iterator():
+        campaign.recipients.update(message=campaign.message)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0012_multymessenger_phone_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Campaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=100)),
+                ("message", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "campaign",
+            },
+        ),
+        migrations.AddField(
+            model_name="multymessenger",
+            name="campaign",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recipients",
+                to="multymessenger.campaign",
+            ),
+        ),
+        migrations.RunPython(move_messages_to_campaigns, move_messages_to_recipients),
+        # A default lets the column be re-added when this migration is reversed
+        migrations.AlterField(
+            model_name="multymessenger",
+            name="message",
+            field=models.TextField(default=""),
+        ),
+        migrations.RemoveField(
+            model_name="multymessenger",
+            name="message",
+        ),
+    ]
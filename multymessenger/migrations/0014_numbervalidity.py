@@ -0,0 +1,61 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:41
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_invalid_numbers(apps, schema_editor):
+    """
+    Carry over the numbers already marked invalid by earlier sends.
+    """
+    MultyMessenger = apps.get_model("multymessenger", "MultyMessenger")
+    NumberValidity = apps.get_model("multymessenger", "NumberValidity")
+
+    invalid = (
+        MultyMessenger.objects.filter(contact_num_valid="no")
+        .exclude(phone_key="")
+        .values("phone_key")
+        .annotate(checked_at=Max("date_sent"))
+    )
+    NumberValidity.objects.bulk_create(
+        [
+            NumberValidity(
+                phone_key=row["phone_key"],
+                is_valid=False,
+                checked_at=row["checked_at"],
+            )
+            for row in invalid.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0013_campaign"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberValidity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("phone_key", models.CharField(max_length=16, unique=True)),
+                ("is_valid", models.BooleanField()),
+                ("checked_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "number_validity",
+            },
+        ),
+        migrations.RunPython(seed_invalid_numbers, migrations.RunPython.noop),
+    ]
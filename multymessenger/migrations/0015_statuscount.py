@@ -0,0 +1,83 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_status_counts(apps, schema_editor):
+    """
+    Count the existing campaign recipients once; later changes are applied incrementally.
+    """
+    MultyMessenger = apps.get_model("multymessenger", "MultyMessenger")
+    StatusCount = apps.get_model("multymessenger", "StatusCount")
+
+    groups = (
+        MultyMessenger.objects.filter(campaign__isnull=False)
+        .values("campaign_id", "message_status", "contact_num_valid")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    StatusCount.objects.bulk_create(
+        [StatusCount(**group) for group in groups.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0014_numbervalidity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "message_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                (
+                    "contact_num_valid",
+                    models.CharField(
+                        choices=[("yes", "Yes"), ("no", "No")], max_length=3
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_counts",
+                        to="multymessenger.campaign",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "status_count",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campaign", "message_status", "contact_num_valid"),
+                        name="unique_status_count",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_status_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0015_statuscount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StepTiming",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("step", models.CharField(max_length=32)),
+                ("count", models.BigIntegerField(default=0)),
+                ("total_seconds", models.FloatField(default=0)),
+                ("max_seconds", models.FloatField(default=0)),
+                ("buckets", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="step_timings",
+                        to="multymessenger.campaign",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "step_timing",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campaign", "step"), name="unique_step_timing"
+                    )
+                ],
+            },
+        ),
+    ]
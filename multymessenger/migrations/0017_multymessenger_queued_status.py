@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0016_steptiming"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="multymessenger",
+            name="message_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("queued", "Queued"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=7,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="statuscount",
+            name="message_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("queued", "Queued"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                max_length=7,
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0017_multymessenger_queued_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="multymessenger",
+            name="message_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("queued", "Queued"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=7,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="statuscount",
+            name="message_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("queued", "Queued"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                max_length=7,
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0018_multymessenger_sending_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="multymessenger",
+            index=models.Index(
+                fields=["message_status", "id"], name="messenger_message_2a44fb_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:31
+
+import django.db.models.functions.comparison
+from itertools import zip_longest
+
+from django.db import migrations, models
+
+
+def merge_duplicate_timings(apps, schema_editor):
+    """
+    Merge the campaign-less rows concurrent flushes duplicated before NULL
+    campaigns were covered by the unique constraint.
+    """
+    StepTiming = apps.get_model("multymessenger", "StepTiming")
+
+    kept = {}
+    for row in StepTiming.objects.filter(campaign__isnull=True).order_by("id"):
+        first = kept.setdefault(row.step, row)
+        if first is row:
+            continue
+        first.count += row.count
+        first.total_seconds += row.total_seconds
+        first.max_seconds = max(first.max_seconds, row.max_seconds)
+        first.buckets = [
+            a + b for a, b in zip_longest(first.buckets, row.buckets, fillvalue=0)
+        ]
+        first.save()
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("multymessenger", "0019_messenger_status_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_timings, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="steptiming",
+            name="unique_step_timing",
+        ),
+        migrations.AddConstraint(
+            model_name="steptiming",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.comparison.Coalesce(
+                    "campaign", models.Value(0)
+                ),
+                models.F("step"),
+                name="unique_step_timing",
+            ),
+        ),
+    ]
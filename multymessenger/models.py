@@ -1,11 +1,36 @@
 # multymessenger/models.py
 
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+class Campaign(models.Model):
+    """
+    One message sent to many recipients.
+    The body is stored once here and every recipient row points to it.
+    """
+    # Optional label shown in reports
+    name = models.CharField(max_length=100, blank=True)
+
+    # The message content
+    message = models.TextField()
+
+    # Automatically set when the campaign is queued
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'campaign'
+
+    def __str__(self):
+        return f"Campaign {self.id} {self.name}".strip()
+
 
 class MultyMessenger(models.Model):
     YES_NO_CHOICES = [('yes', 'Yes'), ('no', 'No')]
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('queued', 'Queued'),  # Claimed by a queue worker, not attempted yet
+        ('sending', 'Sending'),  # Handed to WhatsApp, outcome not written yet
         ('sent', 'Sent'),
         ('failed', 'Failed'),
     ]
@@ -23,8 +48,13 @@ class MultyMessenger(models.Model):
     # Required contact number
     contact_num = models.TextField()
 
-    # The message content
-    message = models.TextField()
+    # Normalised E.164 form of `contact_num`, fixed width so it can be indexed
+    phone_key = models.CharField(max_length=16, default='', blank=True)
+
+    # Campaign holding the message content (empty for contacts that were only uploaded)
+    campaign = models.ForeignKey(
+        Campaign, null=True, blank=True, on_delete=models.CASCADE, related_name='recipients'
+    )
 
     # Automatically set the date when the message is sent
     date_sent = models.DateTimeField(auto_now_add=True)
@@ -39,9 +69,114 @@ class MultyMessenger(models.Model):
         db_table = 'messenger'  # Custom database table name
         indexes = [
             models.Index(fields=['unique_id']), 
-            models.Index(fields=['contact_num']),
+            models.Index(fields=['phone_key']),
             models.Index(fields=['date_sent']),
+            # Serves the dispatcher's "oldest pending first" scan without a sort
+            models.Index(fields=['message_status', 'id']),
+            # Serves per-number status lookups (e.g. the pending numbers to validate)
+            models.Index(fields=['message_status', 'phone_key']),
+        ]
+
+    def __str__(self):
+        return f"Message to {self.unique_id} {self.contact_num} - {self.get_message_status_display()} sent at {self.date_sent}"
+
+
+class UniqueIdSequence(models.Model):
+    """
+    Counter behind the `MuM_<n>` unique IDs.
+    IDs are reserved from it in blocks, so inserts don't have to scan the messenger table.
+    """
+    # Name of the sequence (one row per ID prefix)
+    name = models.CharField(max_length=20, unique=True)
+
+    # Next number that has not been handed out yet
+    next_value = models.BigIntegerField(default=100)
+
+    class Meta:
+        db_table = 'unique_id_sequence'
+
+    def __str__(self):
+        return f"{self.name} -> {self.next_value}"
+
+
+class NumberValidity(models.Model):
+    """
+    Last known WhatsApp registration state of a normalised phone number.
+    Consulted before a recipient is scheduled so known-dead numbers cost nothing.
+    """
+    # Normalised E.164 number, same format as `MultyMessenger.phone_key`
+    phone_key = models.CharField(max_length=16, unique=True)
+
+    # Whether the number opened a chat (True) or showed the invalid-number dialog (False)
+    is_valid = models.BooleanField()
+
+    # When the number was last checked; entries older than the TTL are ignored
+    checked_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'number_validity'
+
+    def __str__(self):
+        return f"{self.phone_key} {'valid' if self.is_valid else 'invalid'} at {self.checked_at}"
+
+
+class StatusCount(models.Model):
+    """
+    Running count of a campaign's recipients per `(message_status, contact_num_valid)`.
+    Kept up to date as rows are inserted and their statuses change, so reports
+    never have to COUNT(*) the messenger table.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='status_counts')
+
+    message_status = models.CharField(max_length=7, choices=MultyMessenger.STATUS_CHOICES)
+
+    contact_num_valid = models.CharField(max_length=3, choices=MultyMessenger.YES_NO_CHOICES)
+
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'status_count'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['campaign', 'message_status', 'contact_num_valid'], name='unique_status_count'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} {self.message_status}/{self.contact_num_valid}: {self.count}"
+
+
+class StepTiming(models.Model):
+    """
+    Histogram of the time spent in one step of the send pipeline, per campaign.
+    Steps timed outside a campaign (e.g. by `validate_numbers`) have no campaign.
+    Workers merge their measurements in on every status flush, so every
+    process can serve the same numbers.
+    """
+    campaign = models.ForeignKey(
+        Campaign, null=True, blank=True, on_delete=models.CASCADE, related_name='step_timings'
+    )
+
+    # Pipeline step, e.g. "chat_open" or "db_write"
+    step = models.CharField(max_length=32)
+
+    # Number of measurements, their sum and the slowest one, in seconds
+    count = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    max_seconds = models.FloatField(default=0)
+
+    # Measurements per histogram bucket (see `metrics.STEP_BUCKETS`), last one is +Inf
+    buckets = models.JSONField(default=list)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'step_timing'
+        constraints = [
+            # NULLs never collide in a unique index, so campaign-less rows are keyed as
+            # campaign 0 (MySQL ignores conditional constraints, expressions it enforces)
+            models.UniqueConstraint(Coalesce('campaign', Value(0)), 'step', name='unique_step_timing'),
         ]
 
     def __str__(self):
-        return f"Message to {self.unique_id} {self.contact_num} - {self.get_message_status_display} sent at {self.date_sent}"
+        return f"{self.campaign_id} {self.step}: {self.count} in {self.total_seconds:.1f}s"
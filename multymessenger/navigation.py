@@ -0,0 +1,127 @@
+# multymessenger/navigation.py
+
+from django.conf import settings
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib.parse import unquote
+
+import logging
+import time
+
+from .browser import get_whatsapp_url
+from .phones import whatsapp_phone
+from .timing import STEP_ALERT_CHECK, STEP_CHAT_OPEN, STEP_COMPOSE_WAIT, observe, timed
+from .waits import (
+    CHAT_INVALID, CHAT_READY, CHAT_SEARCH_BOX_XPATH, CHAT_SEARCH_EMPTY_XPATH, CHAT_SEARCH_RESULT_XPATH,
+    COMPOSE_BOX_XPATH, NEW_CHAT_BUTTON_XPATH, POLL_FREQUENCY, first_visible, get_timeout, wait_for_chat,
+)
+
+SEND_MODE_RELOAD = "reload"
+SEND_MODE_IN_PAGE = "in_page"
+
+# Types the draft into the compose box the way a paste would, so emoji and
+# line breaks survive (send_keys can't type either into WhatsApp's editor)
+INSERT_DRAFT_JS = """
+const box = arguments[0];
+box.focus();
+document.execCommand('selectAll', false, null);
+document.execCommand('insertText', false, arguments[1]);
+"""
+
+
+def build_chat_url(contact_num, payload):
+    """
+    Build the WhatsApp Web URL that opens a chat with the URL-encoded `payload` prefilled.
+    """
+    return f"{get_whatsapp_url()}/send?phone={whatsapp_phone(contact_num)}&text={payload}"
+
+
+def get_send_mode():
+    """
+    Return the configured way of opening chats (`reload` or `in_page`).
+    """
+    return getattr(settings, "WHATSAPP_SEND_MODE", SEND_MODE_RELOAD)
+
+
+def _timed_wait_for_chat(driver, **kwargs):
+    """
+    `wait_for_chat`, timed as a compose-box wait or, if the number turned out
+    to be invalid, as an alert check.
+    """
+    start = time.perf_counter()
+    state = None
+    try:
+        state, element = wait_for_chat(driver, **kwargs)
+        return state, element
+    finally:
+        observe(STEP_ALERT_CHECK if state == CHAT_INVALID else STEP_COMPOSE_WAIT, time.perf_counter() - start)
+
+
+def search_chat(driver, contact_num, timeout):
+    """
+    Open the chat for `contact_num` through WhatsApp Web's own "New chat" search,
+    without leaving the loaded app. Returns False when the search finds no chat
+    for the number (e.g. it is not on WhatsApp). Raises TimeoutException if
+    a step of the search does not respond within `timeout` seconds.
+    """
+    wait = WebDriverWait(
+        driver, timeout, poll_frequency=POLL_FREQUENCY,
+        ignored_exceptions=(StaleElementReferenceException,),
+    )
+    # The chat on screen is replaced once the new one opens
+    previous_chat = driver.find_elements(By.XPATH, COMPOSE_BOX_XPATH)
+
+    wait.until(EC.element_to_be_clickable((By.XPATH, NEW_CHAT_BUTTON_XPATH))).click()
+    search_box = wait.until(EC.element_to_be_clickable((By.XPATH, CHAT_SEARCH_BOX_XPATH)))
+    digits = whatsapp_phone(contact_num)
+    search_box.send_keys(Keys.CONTROL, "a")
+    search_box.send_keys(Keys.BACKSPACE)
+    search_box.send_keys(f"+{digits}")
+
+    found, element = wait.until(first_visible({
+        CHAT_READY: (By.XPATH, CHAT_SEARCH_RESULT_XPATH.format(digits=digits)),
+        CHAT_INVALID: (By.XPATH, CHAT_SEARCH_EMPTY_XPATH),
+    }))
+    if found == CHAT_INVALID:
+        search_box.send_keys(Keys.ESCAPE)
+        return False
+
+    element.click()
+    if previous_chat:
+        wait.until(EC.staleness_of(previous_chat[0]))
+    return True
+
+
+def open_chat(driver, contact_num, payload, mode=None):
+    """
+    Open the chat for `contact_num` with the URL-encoded `payload` prefilled and wait until it
+    is ready or reported invalid. Returns the result of `wait_for_chat`.
+
+    In `in_page` mode the chat is opened through the app's "New chat" search,
+    which keeps the WhatsApp Web JS heap warm, and the draft is typed into it.
+    Numbers the search does not find, or a search that does not respond in
+    time, fall back to loading the URL with a full navigation, which also
+    reports numbers that are not on WhatsApp.
+    """
+    mode = mode or get_send_mode()
+
+    if mode == SEND_MODE_IN_PAGE and driver.current_url.startswith(get_whatsapp_url()):
+        timeout = get_timeout("in_page_open")
+        try:
+            with timed(STEP_CHAT_OPEN):
+                found = search_chat(driver, contact_num, timeout)
+            if found:
+                state, compose_box = _timed_wait_for_chat(driver, timeout=timeout)
+                if state == CHAT_READY:
+                    driver.execute_script(INSERT_DRAFT_JS, compose_box, unquote(payload))
+                return state, compose_box
+            logging.info(f"Chat search found no chat for {contact_num}, opening it by URL.")
+        except TimeoutException:
+            logging.warning(f"Chat search did not open the chat for {contact_num}, reloading.")
+
+    with timed(STEP_CHAT_OPEN):
+        driver.get(build_chat_url(contact_num, payload))
+    return _timed_wait_for_chat(driver)
@@ -0,0 +1,146 @@
+# multymessenger/phones.py
+
+from django.conf import settings
+
+import math
+import re
+
+# E.164: "+", no leading zero, 7 to 15 digits (no real number is shorter)
+E164_PATTERN = r"\+[1-9]\d{6,14}"
+
+# Characters people and spreadsheets put inside phone numbers
+SEPARATORS_PATTERN = r"[\s\-().]"
+
+# International prefix written either as "+" or as "00"
+INTERNATIONAL_PREFIX_PATTERN = r"^(?:\+|00)"
+
+E164_RE = re.compile(E164_PATTERN)
+SEPARATORS_RE = re.compile(SEPARATORS_PATTERN)
+INTERNATIONAL_PREFIX_RE = re.compile(INTERNATIONAL_PREFIX_PATTERN)
+TRAILING_ZERO_DECIMALS_RE = re.compile(r"\.0+$")
+
+
+def get_default_country_code():
+    """
+    Return the country code (digits only, e.g. "91") given to numbers typed
+    without one, or None to leave them untouched.
+    """
+    country_code = getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", None)
+    return str(country_code).lstrip("+") if country_code else None
+
+
+def get_national_number_length():
+    """
+    Return the longest number (without trunk zeros) treated as a national number.
+    """
+    return getattr(settings, "PHONE_NATIONAL_NUMBER_LENGTH", 10)
+
+
+def get_min_national_number_length():
+    """
+    Return the shortest number (without trunk zeros) accepted as a national number.
+    """
+    return getattr(settings, "PHONE_NATIONAL_NUMBER_MIN_LENGTH", get_national_number_length())
+
+
+def clean_phone_series(values):
+    """
+    Clean a batch of raw phone cells in one vectorised pass.
+    Handles ints, floats (`9198....0` from Excel), and strings with spaces,
+    dashes, dots or brackets. Empty cells become <NA>.
+    """
+    import pandas as pd  # Only the spreadsheet import path pays for pandas
+
+    phones = pd.Series(values, dtype="object").astype("string").str.strip().fillna("")
+    phones = phones.str.replace(r"\.0+$", "", regex=True)
+    phones = phones.str.replace(SEPARATORS_PATTERN, "", regex=True)
+    return phones.mask(phones == "", pd.NA)
+
+
+def normalize_phone_series(values, default_country_code=None):
+    """
+    Normalise a batch of raw phone numbers to E.164 (`+<digits>`) in one pass.
+
+    Numbers written with "+" or "00" keep their country code. Shorter numbers
+    are treated as national: trunk zeros are dropped and the default
+    country code is prepended. National numbers shorter than
+    `PHONE_NATIONAL_NUMBER_MIN_LENGTH` and anything that is still not valid
+    E.164 become <NA>.
+    """
+    import pandas as pd
+
+    if default_country_code is None:
+        default_country_code = get_default_country_code()
+
+    phones = clean_phone_series(values)
+    international = phones.str.contains(INTERNATIONAL_PREFIX_PATTERN, regex=True).fillna(False).astype(bool)
+    digits = phones.str.replace(INTERNATIONAL_PREFIX_PATTERN, "", regex=True)
+
+    if default_country_code:
+        national_digits = digits.str.lstrip("0")
+        lengths = national_digits.str.len()
+        national = ~international & (lengths <= get_national_number_length()).fillna(False).astype(bool)
+        too_short = national & (lengths < get_min_national_number_length()).fillna(False).astype(bool)
+        digits = digits.mask(national, default_country_code + national_digits).mask(too_short, pd.NA)
+
+    normalized = "+" + digits
+    return normalized.where(valid_phone_mask(normalized), pd.NA)
+
+
+def valid_phone_mask(phones):
+    """
+    Return a boolean Series telling which numbers are valid E.164.
+    """
+    return phones.str.fullmatch(E164_PATTERN).fillna(False).astype(bool)
+
+
+def _normalize_one(value, default_country_code, national_number_length, min_national_number_length):
+    """
+    Pure-Python twin of `normalize_phone_series` for a single value.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    phone = TRAILING_ZERO_DECIMALS_RE.sub("", str(value).strip())
+    phone = SEPARATORS_RE.sub("", phone)
+    if not phone:
+        return None
+
+    international = INTERNATIONAL_PREFIX_RE.search(phone) is not None
+    digits = INTERNATIONAL_PREFIX_RE.sub("", phone)
+    if default_country_code and not international:
+        national_digits = digits.lstrip("0")
+        if len(national_digits) <= national_number_length:
+            if len(national_digits) < min_national_number_length:
+                return None
+            digits = default_country_code + national_digits
+
+    normalized = "+" + digits
+    return normalized if E164_RE.fullmatch(normalized) else None
+
+
+def normalize_phone_numbers(values, default_country_code=None):
+    """
+    Normalise a list of phone numbers, returning a list of the same length
+    with `+<digits>` strings, or None where a number is invalid.
+    Same rules as `normalize_phone_series`, without loading pandas, for the
+    handful of numbers typed into a form or sent one at a time.
+    """
+    if default_country_code is None:
+        default_country_code = get_default_country_code()
+    lengths = (get_national_number_length(), get_min_national_number_length())
+    return [_normalize_one(value, default_country_code, *lengths) for value in values]
+
+
+def normalize_phone_number(value, default_country_code=None):
+    """
+    Normalise a single phone number, or return None when it is invalid.
+    """
+    return normalize_phone_numbers([value], default_country_code)[0]
+
+
+def whatsapp_phone(contact_num):
+    """
+    Return the digits-only form WhatsApp Web expects in `send?phone=`.
+    Numbers that cannot be normalised are passed through as given.
+    """
+    return (normalize_phone_number(contact_num) or str(contact_num)).lstrip("+")
@@ -0,0 +1,182 @@
+# multymessenger/ratelimit.py
+
+from collections import deque
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+import logging
+import threading
+import time
+
+from .shutdown import stop_requested, wait_or_stop
+from .status import STATUS_SUCCESS
+
+DEFAULT_RATE_LIMIT = {
+    "burst": 5,  # Messages that may go out back to back
+    "per_minute": 20,  # Sustained rate when the account is healthy
+    "min_per_minute": 2,  # Floor the adaptive backoff never goes below
+    "window": 20,  # Number of recent outcomes the failure rate is measured over
+    "failure_threshold": 0.3,  # Failure/invalid share of the window that triggers a backoff
+    "backoff_factor": 0.5,  # Rate multiplier applied on backoff
+    "recovery_factor": 1.1,  # Rate multiplier applied per healthy window
+}
+
+# Longest single sleep, so a stop request is noticed while waiting
+MAX_SLEEP = 30
+
+
+def get_rate_limit():
+    """
+    Return the rate limit settings, filled in with the defaults.
+    """
+    return {**DEFAULT_RATE_LIMIT, **getattr(settings, "WHATSAPP_RATE_LIMIT", {})}
+
+
+def parse_quiet_hours(quiet_hours):
+    """
+    Parse a `("HH:MM", "HH:MM")` pair into two `datetime.time` values, or None.
+    """
+    if not quiet_hours:
+        return None
+    start, end = (dt_time.fromisoformat(value) for value in quiet_hours)
+    return start, end
+
+
+def quiet_hours_remaining(now, quiet_hours):
+    """
+    Return how long until the quiet-hours window ends, or a zero timedelta
+    when `now` is outside it. Windows may wrap past midnight (e.g. 21:00-09:00).
+    """
+    if not quiet_hours:
+        return timedelta(0)
+    start, end = quiet_hours
+    current = now.time()
+    if start <= end:
+        inside = start <= current < end
+    else:
+        inside = current >= start or current < end
+    if not inside:
+        return timedelta(0)
+
+    end_at = datetime.combine(now.date(), end, tzinfo=now.tzinfo)
+    if end_at <= now:
+        end_at += timedelta(days=1)
+    return end_at - now
+
+
+def get_quiet_hours():
+    """
+    Return the configured `WHATSAPP_QUIET_HOURS` window, parsed, or None.
+    """
+    return parse_quiet_hours(getattr(settings, "WHATSAPP_QUIET_HOURS", None))
+
+
+def in_quiet_hours(quiet_hours=None):
+    """
+    Return how long the current quiet-hours window still lasts (a zero
+    timedelta outside it). Times are read in `TIME_ZONE`.
+    """
+    return quiet_hours_remaining(timezone.localtime(), quiet_hours or get_quiet_hours())
+
+
+class SendScheduler:
+    """
+    Token-bucket pacing for one WhatsApp account.
+
+    Tokens refill at the current rate up to `burst`. The rate is cut by
+    `backoff_factor` when failures or invalid-number dialogs exceed
+    `failure_threshold` of the last `window` sends, and creeps back up to the
+    configured rate while sends stay healthy. Nothing is sent inside the
+    quiet-hours window. Waits are cut into short sleeps and end early when
+    the worker is asked to stop.
+    """
+
+    def __init__(self, account, rate_limit=None, quiet_hours=None, clock=time.monotonic, sleep=wait_or_stop):
+        config = {**get_rate_limit(), **(rate_limit or {})}
+        self.account = account
+        self.burst = config["burst"]
+        self.max_rate = config["per_minute"] / 60.0
+        self.min_rate = config["min_per_minute"] / 60.0
+        self.failure_threshold = config["failure_threshold"]
+        self.backoff_factor = config["backoff_factor"]
+        self.recovery_factor = config["recovery_factor"]
+        self.quiet_hours = parse_quiet_hours(quiet_hours) if quiet_hours is not None else get_quiet_hours()
+
+        self.rate = self.max_rate
+        self.tokens = float(self.burst)
+        self.outcomes = deque(maxlen=config["window"])
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def quiet_hours_remaining(self):
+        return in_quiet_hours(self.quiet_hours) if self.quiet_hours else timedelta(0)
+
+    def wait_for_quiet_hours(self):
+        """
+        Block until the quiet-hours window is over or a stop is requested.
+        """
+        remaining = self.quiet_hours_remaining()
+        if remaining:
+            logging.info(f"Account {self.account} is in quiet hours, pausing for {remaining}.")
+        while remaining and not stop_requested():
+            self._sleep(min(remaining.total_seconds(), MAX_SLEEP))
+            remaining = self.quiet_hours_remaining()
+
+    def acquire(self):
+        """
+        Block until this account may send the next message, or a stop is requested.
+        """
+        self.wait_for_quiet_hours()
+        with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                if stop_requested():
+                    return
+                self._sleep(min((1 - self.tokens) / self.rate, MAX_SLEEP))
+                self._refill()
+            self.tokens -= 1
+
+    def record(self, status):
+        """
+        Feed a send outcome back into the adaptive rate.
+        """
+        with self._lock:
+            self.outcomes.append(status == STATUS_SUCCESS)
+            if len(self.outcomes) < self.outcomes.maxlen:
+                return
+
+            failure_rate = self.outcomes.count(False) / len(self.outcomes)
+            if failure_rate > self.failure_threshold:
+                self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+                self.tokens = min(self.tokens, 0.0)
+                logging.warning(
+                    f"Account {self.account}: {failure_rate:.0%} of recent sends failed or hit "
+                    f"invalid numbers, slowing to {self.rate * 60:.1f}/min."
+                )
+            else:
+                self.rate = min(self.max_rate, self.rate * self.recovery_factor)
+            # Judge the next window on fresh outcomes only
+            self.outcomes.clear()
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(account):
+    """
+    Return the process-wide scheduler for a sending account, creating it on first use.
+    """
+    with _schedulers_lock:
+        if account not in _schedulers:
+            _schedulers[account] = SendScheduler(account)
+        return _schedulers[account]
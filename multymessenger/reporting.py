@@ -0,0 +1,57 @@
+# multymessenger/reporting.py
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import MultyMessenger
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    """
+    Encode the `(date_sent, id)` position of `row` as an opaque, URL-safe cursor.
+    """
+    position = f"{row.date_sent.isoformat()}|{row.id}"
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by `encode_cursor` back into `(date_sent, id)`.
+    """
+    try:
+        date_sent, row_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(date_sent), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def message_history(cursor=None, limit=DEFAULT_PAGE_SIZE, campaign_id=None, message_status=None):
+    """
+    Return one page of campaign recipients, newest first, and the cursor of the next page.
+
+    Pages are keyed on `(date_sent, id)` rather than OFFSET, so every page is an
+    index range scan on `date_sent` no matter how deep the manager pages.
+    Returns `(rows, next_cursor)`; `next_cursor` is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = MultyMessenger.objects.filter(campaign__isnull=False).order_by("-date_sent", "-id")
+    if campaign_id is not None:
+        rows = rows.filter(campaign_id=campaign_id)
+    if message_status:
+        rows = rows.filter(message_status=message_status)
+    if cursor:
+        date_sent, row_id = decode_cursor(cursor)
+        rows = rows.filter(Q(date_sent__lt=date_sent) | Q(date_sent=date_sent, id__lt=row_id))
+
+    page = list(rows[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,82 @@
+# multymessenger/sender.py
+
+import logging
+
+from .backends import get_send_backend
+from .ratelimit import get_scheduler
+from .shutdown import stop_requested
+from .status import STATUS_INVALID, StatusWriter
+from .timing import STEP_MESSAGE, STEP_PACING_WAIT, campaign_timing, timed
+
+
+def send_whatsapp_message(recipients, payloads, backend=None):
+    """
+    Send WhatsApp messages through one session of the configured send backend
+    (by default a pooled, logged-in WebDriver session).
+    `recipients` are MultyMessenger rows and `payloads` maps each row id to its
+    pre-rendered, URL-encoded message. Each row is marked `sending` before its
+    message goes out and outcomes are written back in batches while the loop
+    runs; every step is timed under the recipients' campaign. The loop stops
+    early, leaving the remaining rows unsent, when the worker is asked to stop.
+    """
+    backend = backend or get_send_backend()
+
+    # File every step timed below (including a browser launch) under the recipients' campaign
+    with campaign_timing(recipients[0].campaign_id if recipients else None):
+        try:
+            session = backend.acquire()
+        except Exception as e:
+            logging.error(f"Error during WhatsApp Web login: {e}")
+            raise Exception("Failed to log in to WhatsApp Web. Please try again.")
+
+        scheduler = get_scheduler(session.name)
+        results = []
+
+        with StatusWriter() as status_writer:
+
+            def record_result(recipient, status):
+                results.append((recipient.contact_num, status))
+                status_writer.record(recipient.id, status, recipient.phone_key)
+                scheduler.record(status)
+
+            try:
+                for recipient in recipients:
+                    contact_num = recipient.contact_num
+                    if scheduler.quiet_hours_remaining():
+                        # Don't hold the session all night: hand the rest back to the queue,
+                        # which the dispatcher leaves alone until quiet hours are over
+                        logging.info("Quiet hours started, leaving the remaining contacts for later.")
+                        break
+                    # Pace this account: token bucket, adaptive backoff and quiet hours
+                    with timed(STEP_PACING_WAIT):
+                        scheduler.acquire()
+                    if stop_requested():
+                        logging.info("Stop requested, leaving the remaining contacts unsent.")
+                        break
+                    try:
+                        status_writer.begin(recipient.id)
+                        with timed(STEP_MESSAGE):
+                            status = backend.send(session, contact_num, payloads[recipient.id])
+                        if status == STATUS_INVALID:
+                            logging.warning(f"Invalid URL for contact: {contact_num}")
+                        else:
+                            logging.info(f"Message sent successfully to {contact_num}.")
+                        record_result(recipient, status)
+                    except Exception as e:
+                        if not backend.is_healthy(session):
+                            # The browser died: the remaining rows go back to the queue for a fresh
+                            # session; this one stays `sending` as it may already have gone out
+                            logging.error(f"WebDriver session died while sending to {contact_num}: {e}")
+                            status_writer.flush()
+                            break
+                        logging.error(f"Failed to send message to {contact_num}: {e}")
+                        record_result(recipient, f"Failed: {str(e)}")
+
+            except Exception as e:
+                logging.error(f"Unexpected error during message sending: {e}")
+            finally:
+                # Keep the browser for the next job; the pool relaunches it if it died
+                backend.release(session)
+                logging.info("WebDriver session returned to the pool.")
+
+    return results
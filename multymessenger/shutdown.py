@@ -0,0 +1,24 @@
+# multymessenger/shutdown.py
+
+import threading
+
+# Set when the worker has been asked to stop; every send loop checks it
+_stop = threading.Event()
+
+
+def request_stop():
+    """
+    Ask every send loop in this process to finish the message in hand and return.
+    """
+    _stop.set()
+
+
+def stop_requested():
+    return _stop.is_set()
+
+
+def wait_or_stop(seconds):
+    """
+    Sleep for up to `seconds`, returning early (True) if a stop is requested.
+    """
+    return _stop.wait(seconds)
@@ -0,0 +1,170 @@
+# multymessenger/spreadsheets.py
+
+from openpyxl import load_workbook
+import pandas as pd
+
+import codecs
+import csv
+import os
+import zipfile
+
+from .phones import normalize_phone_series
+
+# Columns expected in an uploaded contact sheet
+PHONE_COLUMN = "phone"
+FIRST_NAME_COLUMN = "f_name"
+LAST_NAME_COLUMN = "l_name"
+
+CSV_EXTENSIONS = {".csv", ".txt"}
+LEGACY_EXCEL_EXTENSIONS = {".xls"}
+
+
+def cell_to_str(value):
+    """
+    Convert a spreadsheet cell to a stripped string, or None when empty.
+    Whole-number floats (Excel's way of storing phone numbers) lose their `.0`.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _iter_xlsx_rows(file):
+    """
+    Lazily yield the rows of the first worksheet as tuples of raw cell values.
+    """
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except zipfile.BadZipFile:
+        raise ValueError("The uploaded file is not a valid Excel (.xlsx) or CSV file.")
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(file):
+    """
+    Yield the rows of the first worksheet of a legacy Excel 97-2003 (.xls) upload.
+    The format caps a sheet at 65,536 rows, so the file is read in one go.
+    """
+    try:
+        import xlrd
+    except ImportError:
+        raise ValueError("Legacy .xls files need the xlrd package; save the sheet as .xlsx or CSV instead.")
+
+    try:
+        workbook = xlrd.open_workbook(file_contents=file.read(), on_demand=True)
+    except xlrd.XLRDError as e:
+        raise ValueError(f"The uploaded .xls file could not be read: {e}")
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for index in range(sheet.nrows):
+            yield tuple(sheet.row_values(index))
+    finally:
+        workbook.release_resources()
+
+
+def _iter_csv_rows(file):
+    """
+    Lazily yield the rows of a CSV upload, decoding it on the fly.
+    """
+    yield from csv.reader(codecs.iterdecode(file, "utf-8-sig"))
+
+
+def iter_sheet_rows(file):
+    """
+    Yield `(row_number, row)` for every data row of an uploaded contact sheet
+    (Excel .xlsx/.xls or CSV), where `row` is a dict keyed by the header row.
+    Row numbers match the sheet, so the header is row 1.
+    Only one row is held in memory at a time.
+    """
+    extension = os.path.splitext(getattr(file, "name", "") or "")[1].lower()
+    if extension in CSV_EXTENSIONS:
+        rows = _iter_csv_rows(file)
+    elif extension in LEGACY_EXCEL_EXTENSIONS:
+        rows = _iter_xls_rows(file)
+    else:
+        rows = _iter_xlsx_rows(file)
+
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [cell_to_str(name) for name in header]
+    if PHONE_COLUMN not in columns:
+        raise ValueError(f"The uploaded file has no '{PHONE_COLUMN}' column.")
+
+    for row_number, values in enumerate(rows, start=2):
+        if not any(cell_to_str(value) for value in values):
+            continue  # Blank line, e.g. trailing formatted rows in Excel
+        yield row_number, dict(zip(columns, values))
+
+
+def _clean_name_series(values):
+    """
+    Strip a batch of name cells, turning blanks into None.
+    """
+    names = pd.Series(values, dtype="object").astype("string").str.strip().fillna("")
+    return names.astype("object").where(names != "", None)
+
+
+def parse_contact_rows(rows):
+    """
+    Parse a batch of `(row_number, row)` pairs in one vectorised pass.
+
+    Phone, first name and last name are kept on the same DataFrame row, so a
+    blank name cell can never shift names onto another contact's number.
+    Returns `(contacts, rejected)`: `(contact_num, f_name, l_name)` tuples and
+    `(row_number, value, reason)` tuples for rows without a valid number.
+    """
+    if not rows:
+        return [], []
+
+    frame = pd.DataFrame({
+        "row": [row_number for row_number, _ in rows],
+        "raw_phone": [row.get(PHONE_COLUMN) for _, row in rows],
+        "f_name": [row.get(FIRST_NAME_COLUMN) for _, row in rows],
+        "l_name": [row.get(LAST_NAME_COLUMN) for _, row in rows],
+    })
+    frame["phone"] = normalize_phone_series(frame["raw_phone"])
+    frame["f_name"] = _clean_name_series(frame["f_name"])
+    frame["l_name"] = _clean_name_series(frame["l_name"])
+
+    valid = frame["phone"].notna()
+    accepted = frame[valid]
+    contacts = list(zip(
+        accepted["phone"].tolist(), accepted["f_name"].tolist(), accepted["l_name"].tolist()
+    ))
+
+    invalid = frame[~valid]
+    values = [cell_to_str(value) for value in invalid["raw_phone"]]
+    reasons = ["invalid phone number" if value else "missing phone number" for value in values]
+    rejected = list(zip(invalid["row"].tolist(), values, reasons))
+    return contacts, rejected
+
+
+def iter_contact_chunks(file, chunk_size, rejected=None):
+    """
+    Yield lists of at most `chunk_size` valid `(contact_num, f_name, l_name)`
+    contacts from an uploaded sheet. Rows that fail validation are appended
+    to `rejected` as `(row_number, value, reason)` when a list is given.
+    """
+    batch = []
+    for item in iter_sheet_rows(file):
+        batch.append(item)
+        if len(batch) >= chunk_size:
+            contacts, bad_rows = parse_contact_rows(batch)
+            if rejected is not None:
+                rejected.extend(bad_rows)
+            if contacts:
+                yield contacts
+            batch = []
+
+    contacts, bad_rows = parse_contact_rows(batch)
+    if rejected is not None:
+        rejected.extend(bad_rows)
+    if contacts:
+        yield contacts
@@ -0,0 +1,106 @@
+# multymessenger/stats.py
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import MultyMessenger, StatusCount
+
+
+def _apply_deltas(deltas):
+    """
+    Add `{(campaign_id, message_status, contact_num_valid): delta}` to the aggregate table.
+    Increments are done in SQL, so concurrent writers never lose an update.
+    """
+    for (campaign_id, message_status, contact_num_valid), delta in deltas.items():
+        if not delta or campaign_id is None:
+            continue
+        key = dict(campaign_id=campaign_id, message_status=message_status, contact_num_valid=contact_num_valid)
+        if not StatusCount.objects.filter(**key).update(count=F("count") + delta):
+            StatusCount.objects.bulk_create([StatusCount(**key)], ignore_conflicts=True)
+            StatusCount.objects.filter(**key).update(count=F("count") + delta)
+
+
+def record_created(campaign_id, count, message_status="pending", contact_num_valid="yes"):
+    """
+    Count `count` newly inserted recipient rows of a campaign.
+    """
+    _apply_deltas({(campaign_id, message_status, contact_num_valid): count})
+
+
+def update_statuses(row_ids, message_status, contact_num_valid=None, current_status=None):
+    """
+    Set the status of the given messenger rows and move them between the
+    aggregate counters. The previous states are read by primary key and
+    locked until the counters are updated, so the cost grows with the number
+    of rows changed, not with the table, and concurrent updates of the same
+    rows cannot make the counters drift.
+    `contact_num_valid=None` keeps each row's validity, and `current_status`
+    only touches rows that are still in that status.
+    Returns the number of rows whose state changed.
+    """
+    rows = MultyMessenger.objects.filter(id__in=list(row_ids))
+    if current_status is not None:
+        rows = rows.filter(message_status=current_status)
+    if contact_num_valid is None:
+        rows = rows.exclude(message_status=message_status)
+    else:
+        rows = rows.exclude(message_status=message_status, contact_num_valid=contact_num_valid)
+    new_fields = {"message_status": message_status}
+    if contact_num_valid is not None:
+        new_fields["contact_num_valid"] = contact_num_valid
+
+    with transaction.atomic():
+        # Lock the rows while their previous states are read, so a concurrent
+        # update cannot change them between this read and the UPDATE below
+        before = list(
+            rows.select_for_update()
+            .order_by("id")
+            .values_list("id", "campaign_id", "message_status", "contact_num_valid")
+        )
+        changed = MultyMessenger.objects.filter(id__in=[row_id for row_id, *_ in before]).update(**new_fields)
+
+        deltas = Counter()
+        for _, campaign_id, old_status, old_valid in before:
+            deltas[(campaign_id, old_status, old_valid)] -= 1
+            deltas[(campaign_id, message_status, contact_num_valid or old_valid)] += 1
+        _apply_deltas(deltas)
+    return changed
+
+
+def delete_recipients(rows):
+    """
+    Delete the given messenger rows (a queryset) and take them off the aggregate
+    counters. Returns the number of rows deleted.
+    """
+    with transaction.atomic():
+        # Locked like in `update_statuses`, so the states counted are the ones deleted
+        before = list(
+            rows.select_for_update()
+            .order_by("id")
+            .values_list("id", "campaign_id", "message_status", "contact_num_valid")
+        )
+        deleted, _ = MultyMessenger.objects.filter(id__in=[row_id for row_id, *_ in before]).delete()
+
+        deltas = Counter()
+        for _, campaign_id, message_status, contact_num_valid in before:
+            deltas[(campaign_id, message_status, contact_num_valid)] -= 1
+        _apply_deltas(deltas)
+    return deleted
+
+
+def status_totals(campaign_id=None):
+    """
+    Return `{(message_status, contact_num_valid): count}` for one campaign, or all campaigns.
+    """
+    counts = StatusCount.objects.all()
+    if campaign_id is not None:
+        counts = counts.filter(campaign_id=campaign_id)
+    return {
+        (message_status, contact_num_valid): total
+        for message_status, contact_num_valid, total in counts.values_list("message_status", "contact_num_valid")
+        .annotate(total=Sum("count"))
+        .order_by()
+        if total
+    }
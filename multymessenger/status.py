@@ -0,0 +1,103 @@
+# multymessenger/status.py
+
+from django.conf import settings
+
+import logging
+import time
+
+from .stats import update_statuses
+from .timing import STEP_DB_WRITE, flush_timings, timed
+from .validity import get_validity_cache
+
+STATUS_SUCCESS = "Success"
+STATUS_INVALID = "Invalid URL, skipped"
+
+# Flushes tried when the writer is closed before buffered outcomes are given up
+CLOSE_FLUSH_ATTEMPTS = 3
+
+
+def status_fields(status):
+    """
+    Map a send result to the `(message_status, contact_num_valid)` it is stored as.
+    Only the invalid-number dialog marks a number invalid; other failures may be transient.
+    """
+    if status == STATUS_SUCCESS:
+        return "sent", "yes"
+    if status == STATUS_INVALID:
+        return "failed", "no"
+    return "failed", "yes"
+
+
+class StatusWriter:
+    """
+    Buffers send outcomes and writes them back in bulk.
+
+    The buffer is flushed every `flush_every` results or `flush_interval`
+    seconds, whichever comes first, and when the writer is closed. Each
+    flush issues one UPDATE per distinct outcome instead of two queries per row,
+    and moves the rows between the campaign's aggregate counters. Outcomes a
+    flush fails to write stay buffered and are retried by the next one.
+    Outcomes that prove whether a number is on WhatsApp also refresh the
+    validity cache, and the step timings taken so far are saved alongside.
+
+    Rows are marked `sending` one by one, before their message goes out, so
+    a worker killed with outcomes still buffered never sends those rows again.
+    """
+
+    def __init__(self, flush_every=None, flush_interval=None):
+        self.flush_every = flush_every or getattr(settings, "STATUS_FLUSH_EVERY", 50)
+        self.flush_interval = flush_interval or getattr(settings, "STATUS_FLUSH_INTERVAL", 5)
+        self._pending = {}
+        self._validity = {}
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed write is retried a few times before the outcomes are given up
+        for attempt in range(CLOSE_FLUSH_ATTEMPTS):
+            if attempt:
+                time.sleep(attempt)
+            if self.flush():
+                return
+        lost = sum(len(ids) for ids in self._pending.values())
+        logging.error(f"Giving up on writing {lost} buffered outcome(s); those rows stay 'sending'.")
+
+    def begin(self, row_id):
+        """
+        Mark a messenger row as being sent. Written straight away, not buffered.
+        """
+        update_statuses([row_id], "sending")
+
+    def record(self, row_id, status, phone_key=None):
+        """
+        Buffer the outcome for one messenger row, flushing if the buffer is due.
+        """
+        self._pending.setdefault(status_fields(status), []).append(row_id)
+        if phone_key and status in (STATUS_SUCCESS, STATUS_INVALID):
+            self._validity[phone_key] = status == STATUS_SUCCESS
+        buffered = sum(len(ids) for ids in self._pending.values())
+        if buffered >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every buffered outcome to the database. Outcomes that could not
+        be written stay buffered for the next flush. Returns True once the
+        buffer is empty.
+        """
+        pending, self._pending = self._pending, {}
+        validity, self._validity = self._validity, {}
+        self._last_flush = time.monotonic()
+        if pending or validity:
+            with timed(STEP_DB_WRITE):
+                get_validity_cache().record(validity)
+                for (message_status, contact_num_valid), row_ids in pending.items():
+                    try:
+                        update_statuses(row_ids, message_status, contact_num_valid)
+                    except Exception as e:
+                        logging.error(f"Error updating status for {len(row_ids)} message(s), will retry: {e}")
+                        self._pending.setdefault((message_status, contact_num_valid), []).extend(row_ids)
+        flush_timings()
+        return not self._pending
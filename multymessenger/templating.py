@@ -0,0 +1,67 @@
+# multymessenger/templating.py
+
+from functools import lru_cache
+from urllib.parse import quote
+
+import re
+
+# Recipient fields that can be used as placeholders, e.g. "Hi {f_name}"
+PLACEHOLDER_FIELDS = ("f_name", "l_name", "contact_num")
+PLACEHOLDER_PATTERN = re.compile(r"\{(" + "|".join(PLACEHOLDER_FIELDS) + r")\}")
+
+
+class MessageTemplate:
+    """
+    A campaign message split once into literal text and placeholder fields.
+    Any other braces in the message are kept as literal text.
+    """
+
+    def __init__(self, text):
+        # re.split with a capture group alternates literal, field, literal, ...
+        parts = PLACEHOLDER_PATTERN.split(text)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    @property
+    def is_personalised(self):
+        return bool(self.fields)
+
+    def render(self, recipient):
+        """
+        Render the message for one recipient row; missing names render as empty text.
+        """
+        if not self.fields:
+            return self.literals[0]
+        values = [getattr(recipient, field, None) or "" for field in self.fields]
+        pieces = [self.literals[0]]
+        for value, literal in zip(values, self.literals[1:]):
+            pieces.append(value)
+            pieces.append(literal)
+        return "".join(pieces)
+
+
+@lru_cache(maxsize=128)
+def compile_template(text):
+    """
+    Return the compiled template for a campaign message, compiling it only once.
+    """
+    return MessageTemplate(text)
+
+
+def encode_message(text):
+    """
+    URL-encode a message for the `text=` parameter of the WhatsApp send URL.
+    """
+    return quote(text, safe="")
+
+
+def render_payloads(template, recipients):
+    """
+    Render and URL-encode the message for every recipient ahead of the send loop.
+    Returns a dict mapping recipient row id to its encoded payload.
+    """
+    if not template.is_personalised:
+        # Same text for everyone: encode it once
+        payload = encode_message(template.render(None))
+        return {recipient.id: payload for recipient in recipients}
+    return {recipient.id: encode_message(template.render(recipient)) for recipient in recipients}
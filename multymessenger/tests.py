@@ -1,3 +1,475 @@
-from django.test import TestCase
+import subprocess
+import sys
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .backends import DryRunBackend, close_send_backend
+from .campaigns import campaign_progress, resume_campaign
+from .dedupe import RecipientDeduper
+from .dispatcher import claim_pending_batch, dispatch_pending, release_claims
+from .management.commands.check_import_budget import WEB_FORBIDDEN_MODULES, WEB_STARTUP_CODE
+from .ids import IdAllocator, reserve_id_block
+from .importer import import_contacts
+from .models import Campaign, MultyMessenger, NumberValidity, StepTiming
+from .phones import normalize_phone_numbers, normalize_phone_series
+from .ratelimit import SendScheduler
+from .reporting import InvalidCursor, decode_cursor, message_history
+from .stats import delete_recipients, status_totals, update_statuses
+from .status import STATUS_INVALID, STATUS_SUCCESS, StatusWriter, status_fields
+from .templating import compile_template, render_payloads
+from .timing import TimingRecorder, step_summaries
+from .validity import ValidityCache, get_validity_cache
+
+PHONE_CASES = [
+    ("98765 43210", "+919876543210"),
+    ("098765-43210", "+919876543210"),
+    ("(98765) 43210", "+919876543210"),
+    (9876543210, "+919876543210"),
+    (9876543210.0, "+919876543210"),
+    ("919876543210", "+919876543210"),
+    ("+44 20 7946 0958", "+442079460958"),
+    ("0044 20 7946 0958", "+442079460958"),
+    # National numbers must be PHONE_NATIONAL_NUMBER_MIN_LENGTH digits long
+    ("0", None),
+    ("1", None),
+    ("12", None),
+    ("987654321", None),
+    ("+12", None),
+    ("not a number", None),
+    ("", None),
+    (None, None),
+]
+
+
+@override_settings(PHONE_DEFAULT_COUNTRY_CODE="91", PHONE_NATIONAL_NUMBER_LENGTH=10, PHONE_NATIONAL_NUMBER_MIN_LENGTH=10)
+class PhoneNormalisationTests(SimpleTestCase):
+    def test_pure_python_normaliser(self):
+        values = [value for value, _ in PHONE_CASES]
+        self.assertEqual(normalize_phone_numbers(values), [expected for _, expected in PHONE_CASES])
+
+    def test_series_normaliser(self):
+        values = [value for value, _ in PHONE_CASES]
+        normalized = normalize_phone_series(values)
+        self.assertEqual(
+            [phone if present else None for phone, present in zip(normalized, normalized.notna())],
+            [expected for _, expected in PHONE_CASES],
+        )
+
+    @override_settings(PHONE_NATIONAL_NUMBER_MIN_LENGTH=7)
+    def test_shorter_national_numbers_can_be_allowed(self):
+        self.assertEqual(normalize_phone_numbers(["1234567", "123456"]), ["+911234567", None])
+        self.assertEqual(normalize_phone_series(["1234567"]).tolist(), ["+911234567"])
+
+
+@override_settings(PHONE_DEFAULT_COUNTRY_CODE="91", PHONE_NATIONAL_NUMBER_LENGTH=10, PHONE_NATIONAL_NUMBER_MIN_LENGTH=10)
+class ContactSheetTests(SimpleTestCase):
+    def test_names_stay_on_their_row_when_numbers_are_dropped(self):
+        from .spreadsheets import iter_contact_chunks
+
+        sheet = SimpleUploadedFile("contacts.csv", (
+            "phone,f_name,l_name\n"
+            "9876543210,Asha,Rao\n"
+            "12,Bad,Number\n"
+            ",,\n"
+            ",No,Phone\n"
+            "9876543211,,Iyer\n"
+            "9876543212,Ravi,\n"
+        ).encode())
+        rejected = []
+        contacts = [contact for chunk in iter_contact_chunks(sheet, 2, rejected=rejected) for contact in chunk]
+        self.assertEqual(contacts, [
+            ("+919876543210", "Asha", "Rao"),
+            ("+919876543211", None, "Iyer"),
+            ("+919876543212", "Ravi", None),
+        ])
+        self.assertEqual(rejected, [(3, "12", "invalid phone number"), (5, None, "missing phone number")])
+
+
+@override_settings(PHONE_DEFAULT_COUNTRY_CODE="91", PHONE_NATIONAL_NUMBER_LENGTH=10, PHONE_NATIONAL_NUMBER_MIN_LENGTH=10)
+class FileUploadTests(TestCase):
+    def test_numbers_listed_twice_prefill_the_form_once(self):
+        sheet = SimpleUploadedFile("contacts.csv", (
+            "phone,f_name,l_name\n"
+            "9876543210,Asha,Rao\n"
+            "9876543211,,Iyer\n"
+            "+91 98765 43210,Asha,Rao\n"
+        ).encode())
+        response = self.client.post("/file-upload/", {"file-upload": sheet})
+        self.assertEqual(response.json()["contact_nums"], ["+919876543210", "+919876543211"])
+
+
+class TemplatingTests(SimpleTestCase):
+    def make_recipient(self, row_id, f_name=None, l_name=None):
+        return MultyMessenger(id=row_id, contact_num="+919876543210", f_name=f_name, l_name=l_name)
+
+    def test_each_recipient_gets_their_own_names(self):
+        template = compile_template("Hi {f_name} {l_name}, {order} & 100% done")
+        payloads = render_payloads(template, [self.make_recipient(1, "Asha", "Rao"), self.make_recipient(2)])
+        self.assertEqual(payloads, {
+            1: "Hi%20Asha%20Rao%2C%20%7Border%7D%20%26%20100%25%20done",
+            2: "Hi%20%20%2C%20%7Border%7D%20%26%20100%25%20done",
+        })
+
+    def test_plain_messages_are_encoded_once(self):
+        template = compile_template("Line one\nline two ✓")
+        self.assertFalse(template.is_personalised)
+        payloads = render_payloads(template, [self.make_recipient(1), self.make_recipient(2)])
+        self.assertEqual(set(payloads.values()), {"Line%20one%0Aline%20two%20%E2%9C%93"})
+
+
+class IdAllocatorTests(TestCase):
+    def test_blocks_do_not_overlap(self):
+        first = reserve_id_block(10)
+        second = reserve_id_block(5)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(second.start, first.stop)
+
+    def test_allocators_never_hand_out_the_same_id(self):
+        one, two = IdAllocator(block_size=3), IdAllocator(block_size=3)
+        ids = one.allocate(4) + two.allocate(4) + one.allocate(2)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertTrue(all(unique_id.startswith("MuM_") for unique_id in ids))
+
+
+class DedupeTests(TestCase):
+    def test_repeated_numbers_are_queued_once(self):
+        campaign = Campaign.objects.create(message="Hi")
+        deduper = RecipientDeduper(campaign, recent_days=0)
+        kept = deduper.filter([("+919876543210", None, None), ("+919876543210", None, None)])
+        self.assertEqual(kept, [("+919876543210", None, None)])
+        self.assertEqual(deduper.duplicates, 1)
+
+    def test_recently_messaged_numbers_are_skipped(self):
+        earlier = Campaign.objects.create(message="First")
+        import_contacts([("+919876543210", None, None)], skip_existing=False, campaign=earlier)
+
+        later = Campaign.objects.create(message="Second")
+        created, skipped = import_contacts(
+            [("+919876543210", None, None), ("+919876543211", None, None)],
+            skip_existing=False, campaign=later, recent_days=7,
+        )
+        self.assertEqual((created, skipped), (1, 1))
+
+        again = Campaign.objects.create(message="Third")
+        created, _ = import_contacts([("+919876543210", None, None)], skip_existing=False, campaign=again, recent_days=0)
+        self.assertEqual(created, 1)
+
+
+class StatusCounterTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+91987654321{i}", None, None) for i in range(4)],
+            skip_existing=False, campaign=self.campaign, recent_days=0,
+        )
+        self.ids = list(self.campaign.recipients.order_by("id").values_list("id", flat=True))
+
+    def test_counters_follow_status_changes(self):
+        self.assertEqual(status_totals(self.campaign.id), {("pending", "yes"): 4})
+        update_statuses(self.ids[:2], "sent", "yes")
+        update_statuses(self.ids[2:3], "failed", "no")
+        self.assertEqual(
+            status_totals(self.campaign.id),
+            {("pending", "yes"): 1, ("sent", "yes"): 2, ("failed", "no"): 1},
+        )
+
+    def test_current_status_limits_the_update(self):
+        update_statuses(self.ids[:1], "sent", "yes")
+        changed = update_statuses(self.ids, "queued", current_status="pending")
+        self.assertEqual(changed, 3)
+        self.assertEqual(status_totals(self.campaign.id), {("queued", "yes"): 3, ("sent", "yes"): 1})
+
+    def test_deleted_rows_leave_the_counters(self):
+        update_statuses(self.ids[:1], "sent", "yes")
+        deleted = delete_recipients(MultyMessenger.objects.filter(id__in=self.ids[:2]))
+        self.assertEqual(deleted, 2)
+        self.assertEqual(status_totals(self.campaign.id), {("pending", "yes"): 2})
+
+
+class ClaimTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+91987654321{i}", None, None) for i in range(3)],
+            skip_existing=False, campaign=self.campaign, recent_days=0,
+        )
+        # Uploaded without a message: never sent
+        import_contacts([("+919876543219", None, None)], skip_existing=False)
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        first = claim_pending_batch(limit=2)
+        second = claim_pending_batch(limit=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertLess(max(row.id for row in first), second[0].id)
+        self.assertEqual(claim_pending_batch(limit=2), [])
+        self.assertEqual(status_totals(self.campaign.id), {("queued", "yes"): 3})
+
+    def test_released_rows_go_back_to_the_queue(self):
+        rows = claim_pending_batch(limit=3)
+        update_statuses([rows[0].id], "sending")
+        self.assertEqual(release_claims(rows), 2)
+        self.assertEqual(status_totals(self.campaign.id), {("sending", "yes"): 1, ("pending", "yes"): 2})
+        self.assertEqual(len(claim_pending_batch(limit=3)), 2)
+
+
+class DryRunBackendTests(TestCase):
+    def test_outcomes_follow_the_configured_rates(self):
+        backend = DryRunBackend(latency=0, send_latency=0, sessions=2)
+        sessions = [backend.acquire(), backend.acquire()]
+        self.assertEqual(backend.send(sessions[0], "+919876543210", "Hi"), STATUS_SUCCESS)
+        backend.release(sessions[0])
+
+        self.assertEqual(DryRunBackend(latency=0, invalid_rate=1).send(sessions[1], "+919876543210", "Hi"), STATUS_INVALID)
+        with self.assertRaises(TimeoutError):
+            DryRunBackend(latency=0, send_latency=0, failure_rate=1).send(sessions[1], "+919876543210", "Hi")
+
+    @override_settings(
+        WHATSAPP_SEND_BACKEND="multymessenger.backends.DryRunBackend",
+        WHATSAPP_DRY_RUN={"latency": 0, "send_latency": 0},
+        WHATSAPP_QUIET_HOURS=None,
+    )
+    def test_worker_sends_a_campaign_without_a_browser(self):
+        self.addCleanup(close_send_backend)
+        self.addCleanup(get_validity_cache().clear)
+        campaign = Campaign.objects.create(message="Hi {f_name}")
+        import_contacts(
+            [(f"+91987654321{i}", "Asha", None) for i in range(3)],
+            skip_existing=False, campaign=campaign, recent_days=0,
+        )
+        self.assertEqual(dispatch_pending(limit=10), 3)
+        self.assertEqual(status_totals(campaign.id), {("sent", "yes"): 3})
+
+
+class StatusWriterTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+91987654321{i}", None, None) for i in range(3)],
+            skip_existing=False, campaign=self.campaign, recent_days=0,
+        )
+        self.ids = list(self.campaign.recipients.order_by("id").values_list("id", flat=True))
+
+    def test_outcomes_map_to_statuses(self):
+        self.assertEqual(status_fields(STATUS_SUCCESS), ("sent", "yes"))
+        self.assertEqual(status_fields(STATUS_INVALID), ("failed", "no"))
+        self.assertEqual(status_fields("Failed: timeout"), ("failed", "yes"))
+
+    def test_outcomes_are_written_in_batches(self):
+        with StatusWriter(flush_every=2, flush_interval=3600) as writer:
+            for row_id, status in zip(self.ids, [STATUS_SUCCESS, STATUS_INVALID, "Failed: timeout"]):
+                writer.begin(row_id)
+                writer.record(row_id, status)
+            # The first two outcomes were flushed, the third is still buffered
+            self.assertEqual(
+                status_totals(self.campaign.id),
+                {("sent", "yes"): 1, ("failed", "no"): 1, ("sending", "yes"): 1},
+            )
+        self.assertEqual(
+            status_totals(self.campaign.id),
+            {("sent", "yes"): 1, ("failed", "no"): 1, ("failed", "yes"): 1},
+        )
+
+    def test_failed_write_is_retried(self):
+        writer = StatusWriter(flush_every=10, flush_interval=3600)
+        writer.record(self.ids[0], STATUS_SUCCESS)
+        with mock.patch("multymessenger.status.update_statuses", side_effect=Exception("lost connection")):
+            self.assertFalse(writer.flush())
+        self.assertTrue(writer.flush())
+        self.assertEqual(status_totals(self.campaign.id), {("sent", "yes"): 1, ("pending", "yes"): 2})
+
+
+class ResumeCampaignTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+91987654321{i}", None, None) for i in range(6)],
+            skip_existing=False, campaign=self.campaign, recent_days=0,
+        )
+        ids = list(self.campaign.recipients.order_by("id").values_list("id", flat=True))
+        # pending, sent, failed, invalid, claimed by a worker, unconfirmed
+        update_statuses(ids[1:2], "sent", "yes")
+        update_statuses(ids[2:3], "failed", "yes")
+        update_statuses(ids[3:4], "failed", "no")
+        update_statuses(ids[4:5], "queued")
+        update_statuses(ids[5:6], "sending")
+
+    def test_only_transient_failures_are_retried_by_default(self):
+        self.assertEqual(resume_campaign(self.campaign.id), 2)
+        progress = campaign_progress(self.campaign.id)
+        self.assertEqual(
+            (progress["pending"], progress["queued"], progress["sending"], progress["failed"]), (2, 1, 1, 1)
+        )
+
+    def test_claimed_and_unconfirmed_rows_are_requeued_on_request(self):
+        queued = resume_campaign(self.campaign.id, retry_failed=False, release_claimed=True, retry_unconfirmed=True)
+        self.assertEqual(queued, 3)
+        progress = campaign_progress(self.campaign.id)
+        self.assertEqual((progress["queued"], progress["sending"], progress["failed"]), (0, 0, 2))
+
+
+class ValidityCacheTests(TestCase):
+    def test_checks_are_shared_through_the_table(self):
+        ValidityCache().record({"+919876543210": False, "+919876543211": True})
+        # A fresh cache (another worker) answers from the table
+        cache = ValidityCache()
+        self.assertEqual(cache.known_invalid(["+919876543210", "+919876543211", "+919876543212"]), {"+919876543210"})
+
+    def test_expired_checks_are_unknown(self):
+        cache = ValidityCache(ttl=timedelta(days=30))
+        cache.record({"+919876543210": False})
+        NumberValidity.objects.update(checked_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(ValidityCache(ttl=timedelta(days=30)).lookup(["+919876543210"]), {})
+        cache.clear()
+        self.assertEqual(cache.lookup(["+919876543210"]), {})
+
+
+class StepTimingTests(TestCase):
+    def test_flushes_merge_into_one_row_per_campaign_and_step(self):
+        campaign = Campaign.objects.create(message="Hi")
+        recorder = TimingRecorder()
+        recorder.observe("send", 0.2, campaign.id)
+        recorder.observe("send", 3.0, campaign.id)
+        recorder.flush()
+        recorder.observe("send", 0.04, campaign.id)
+        recorder.observe("send", 100, None)
+        recorder.flush()
+
+        row = StepTiming.objects.get(campaign=campaign, step="send")
+        self.assertEqual(row.count, 3)
+        self.assertAlmostEqual(row.total_seconds, 3.24)
+        self.assertEqual(row.max_seconds, 3.0)
+        # One in the 0.05 s bucket, one in 0.25 s and one in 5 s
+        self.assertEqual([row.buckets[i] for i in (0, 2, 6)], [1, 1, 1])
+
+        summary, = step_summaries()
+        self.assertEqual((summary["count"], summary["max"], summary["p50"], summary["p95"]), (4, 100, 0.25, None))
+
+    def test_campaign_less_timings_stay_one_row_per_step(self):
+        # A second worker flushing the same step before the first one's row exists
+        for _ in range(2):
+            StepTiming.objects.bulk_create([StepTiming(step="send")], ignore_conflicts=True)
+        recorder = TimingRecorder()
+        recorder.observe("send", 0.2, None)
+        recorder.flush()
+
+        row, = StepTiming.objects.filter(campaign=None, step="send")
+        self.assertEqual(row.count, 1)
+
+
+@override_settings(
+    WHATSAPP_SEND_BACKEND="multymessenger.backends.DryRunBackend",
+    WHATSAPP_DRY_RUN={"latency": 0, "invalid_rate": 1},
+)
+class ValidateNumbersTests(TestCase):
+    def setUp(self):
+        # The validity cache is process-wide; start from what the table holds
+        get_validity_cache().clear()
+
+    def test_dead_numbers_fail_only_rows_still_pending(self):
+        campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+91987654321{i}", None, None) for i in range(3)],
+            skip_existing=False, campaign=campaign, recent_days=0,
+        )
+        claimed = claim_pending_batch(limit=1)
+
+        call_command("validate_numbers", campaign=campaign.id, stdout=StringIO())
+        self.assertEqual(status_totals(campaign.id), {("failed", "no"): 2, ("queued", "yes"): 1})
+        self.assertEqual(NumberValidity.objects.filter(is_valid=False).count(), 2)
+        self.assertFalse(NumberValidity.objects.filter(phone_key=claimed[0].phone_key).exists())
+
+
+class CursorTests(TestCase):
+    def test_pages_cover_every_row_once(self):
+        campaign = Campaign.objects.create(message="Hi")
+        import_contacts(
+            [(f"+9198765432{i:02d}", None, None) for i in range(7)],
+            skip_existing=False, campaign=campaign, recent_days=0,
+        )
+        seen, cursor = [], None
+        while True:
+            rows, cursor = message_history(cursor=cursor, limit=3, campaign_id=campaign.id)
+            seen.extend(row.id for row in rows)
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(MultyMessenger.objects.filter(campaign=campaign).values_list("id", flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_garbage_cursor_is_rejected(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class SendSchedulerTests(SimpleTestCase):
+    def make_scheduler(self, clock, **rate_limit):
+        config = {"burst": 2, "per_minute": 60, "min_per_minute": 6, "window": 4, **rate_limit}
+        return SendScheduler("test", rate_limit=config, quiet_hours=(), clock=clock, sleep=clock.sleep)
+
+    def test_burst_then_steady_rate(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        for _ in range(4):
+            scheduler.acquire()
+        # Two messages go out at once, the next two wait one second each
+        self.assertEqual(clock.slept, [1.0, 1.0])
+
+    def test_failures_slow_the_account_down(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        for status in [STATUS_INVALID, STATUS_INVALID, "Failed: timeout", STATUS_SUCCESS]:
+            scheduler.record(status)
+        self.assertAlmostEqual(scheduler.rate * 60, 30)
+
+
+class ImportBudgetTests(SimpleTestCase):
+    def test_web_tier_does_not_load_worker_only_modules(self):
+        # Only what gets loaded is checked here; the import time is measured by
+        # `check_import_budget`, which runs as its own CI step
+        result = subprocess.run(
+            [sys.executable, "-c", WEB_STARTUP_CODE + "; import sys; print(' '.join(sys.modules))"],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        )
+        loaded = {module.split(".")[0] for module in result.stdout.split()}
+        self.assertEqual(loaded.intersection(WEB_FORBIDDEN_MODULES), set())
+
+
+@override_settings(PROGRESS_STREAM_INTERVAL=0.01, PROGRESS_STREAM_IDLE_TIMEOUT=0.05)
+class ProgressStreamTests(TestCase):
+    async def read_stream(self, campaign_id):
+        response = await self.async_client.get(f"/campaigns/{campaign_id}/progress/")
+        return "".join([chunk.decode() async for chunk in response.streaming_content])
+
+    async def test_rows_stuck_sending_do_not_keep_the_stream_open(self):
+        campaign = await Campaign.objects.acreate(message="Hi")
+        await sync_to_async(import_contacts)(
+            [("+919876543210", None, None)], skip_existing=False, campaign=campaign, recent_days=0,
+        )
+        row_ids = [row_id async for row_id in campaign.recipients.values_list("id", flat=True)]
+        await sync_to_async(update_statuses)(row_ids, "sending")
+
+        body = await self.read_stream(campaign.id)
+        self.assertIn('"sending": 1', body)
+        self.assertTrue(body.endswith("event: done\ndata: {}\n\n"))
@@ -0,0 +1,213 @@
+# multymessenger/timing.py
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import zip_longest
+
+from django.db import transaction
+
+import logging
+import threading
+import time
+
+from .models import StepTiming
+
+# Upper bounds in seconds of the histogram buckets; a last, implicit bucket is +Inf
+STEP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+# Steps of the send pipeline, in the order a message goes through them
+STEP_DRIVER_START = "driver_start"
+STEP_LOGIN_WAIT = "login_wait"
+STEP_PACING_WAIT = "pacing_wait"
+STEP_CHAT_OPEN = "chat_open"
+STEP_COMPOSE_WAIT = "compose_box_wait"
+STEP_ALERT_CHECK = "alert_check"
+STEP_ALERT_DISMISS = "alert_dismiss"
+STEP_SEND = "send"
+STEP_MESSAGE = "message"
+STEP_DB_WRITE = "db_write"
+STEP_ORDER = (
+    STEP_DRIVER_START, STEP_LOGIN_WAIT, STEP_PACING_WAIT, STEP_CHAT_OPEN, STEP_COMPOSE_WAIT,
+    STEP_ALERT_CHECK, STEP_ALERT_DISMISS, STEP_SEND, STEP_MESSAGE, STEP_DB_WRITE,
+)
+
+# Campaign the current thread is sending for; timings are filed under it
+_current_campaign = ContextVar("current_campaign", default=None)
+
+
+class Histogram:
+    """
+    Count, sum, maximum and per-bucket counts of a set of durations.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(STEP_BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(STEP_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(STEP_BUCKETS)
+        self.buckets[index] += 1
+
+
+class TimingRecorder:
+    """
+    Collects step durations in memory and merges them into the `StepTiming` table
+    on `flush`, so the numbers survive the worker and every process sees them.
+    `capture` additionally hands the raw durations to a caller (e.g. a benchmark).
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(Histogram)
+        self._captures = []
+        self._lock = threading.Lock()
+
+    def observe(self, step, seconds, campaign_id=None):
+        if campaign_id is None:
+            campaign_id = _current_campaign.get()
+        with self._lock:
+            self._pending[(campaign_id, step)].observe(seconds)
+            for samples in self._captures:
+                samples[step].append(seconds)
+
+    @contextmanager
+    def capture(self):
+        """
+        Collect `{step: [seconds, ...]}` for every step timed while the block runs.
+        """
+        samples = defaultdict(list)
+        with self._lock:
+            self._captures.append(samples)
+        try:
+            yield samples
+        finally:
+            with self._lock:
+                self._captures.remove(samples)
+
+    def discard(self):
+        """
+        Drop the measurements not flushed yet.
+        """
+        with self._lock:
+            self._pending = defaultdict(Histogram)
+
+    def flush(self):
+        """
+        Merge the buffered measurements into the database.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Histogram)
+        for (campaign_id, step), histogram in pending.items():
+            try:
+                _merge(campaign_id, step, histogram)
+            except Exception as e:
+                logging.error(f"Error saving {histogram.count} timing(s) of step {step}: {e}")
+
+
+def _merge(campaign_id, step, histogram):
+    key = dict(campaign_id=campaign_id, step=step)
+    with transaction.atomic():
+        row = StepTiming.objects.select_for_update().filter(**key).first()
+        if row is None:
+            StepTiming.objects.bulk_create([StepTiming(**key)], ignore_conflicts=True)
+            row = StepTiming.objects.select_for_update().filter(**key).first()
+        row.count += histogram.count
+        row.total_seconds += histogram.total
+        row.max_seconds = max(row.max_seconds, histogram.max)
+        row.buckets = [a + b for a, b in zip_longest(row.buckets, histogram.buckets, fillvalue=0)]
+        row.save(update_fields=["count", "total_seconds", "max_seconds", "buckets", "updated_at"])
+
+
+_recorder = TimingRecorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+def observe(step, seconds, campaign_id=None):
+    """
+    Record that `step` took `seconds`, for the current campaign unless one is given.
+    """
+    _recorder.observe(step, seconds, campaign_id)
+
+
+@contextmanager
+def timed(step):
+    """
+    Time the enclosed block as one run of `step`, whether or not it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(step, time.perf_counter() - start)
+
+
+@contextmanager
+def campaign_timing(campaign_id):
+    """
+    File the timings taken in this thread while the block runs under `campaign_id`.
+    """
+    token = _current_campaign.set(campaign_id)
+    try:
+        yield
+    finally:
+        _current_campaign.reset(token)
+
+
+def flush_timings():
+    _recorder.flush()
+
+
+def _quantile(buckets, count, fraction):
+    """
+    Upper bound of the bucket holding the given share of the measurements.
+    """
+    seen = 0
+    for bound, bucket in zip(STEP_BUCKETS + (None,), buckets):
+        seen += bucket
+        if seen >= fraction * count:
+            return bound
+    return None
+
+
+def step_summaries(campaign_id=None):
+    """
+    Per-step timing summary of one campaign, or of everything when no campaign
+    is given: `[{step, count, total, mean, max, p50, p95, buckets}, ...]` in
+    pipeline order. p50/p95 are bucket upper bounds (None means above the last bucket).
+    """
+    rows = StepTiming.objects.all()
+    if campaign_id is not None:
+        rows = rows.filter(campaign_id=campaign_id)
+
+    merged = {}
+    for step, count, total, slowest, buckets in rows.values_list(
+        "step", "count", "total_seconds", "max_seconds", "buckets"
+    ):
+        summary = merged.setdefault(step, {"step": step, "count": 0, "total": 0.0, "max": 0.0, "buckets": []})
+        summary["count"] += count
+        summary["total"] += total
+        summary["max"] = max(summary["max"], slowest)
+        summary["buckets"] = [a + b for a, b in zip_longest(summary["buckets"], buckets, fillvalue=0)]
+
+    def pipeline_order(summary):
+        step = summary["step"]
+        return (STEP_ORDER.index(step) if step in STEP_ORDER else len(STEP_ORDER), step)
+
+    summaries = sorted(merged.values(), key=pipeline_order)
+    for summary in summaries:
+        summary["mean"] = summary["total"] / summary["count"] if summary["count"] else 0.0
+        summary["p50"] = _quantile(summary["buckets"], summary["count"], 0.5)
+        summary["p95"] = _quantile(summary["buckets"], summary["count"], 0.95)
+    return summaries
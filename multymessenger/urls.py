@@ -6,4 +6,9 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),  # Home route
     path('file-upload/', views.file_upload_endpoint, name='file_upload_endpoint'),  # Add this line
+    path('reports/', views.reports, name='reports'),
+    path('api/reports/', views.reports_api, name='reports_api'),
+    path('campaigns/<int:campaign_id>/progress/', views.campaign_progress_stream, name='campaign_progress_stream'),
+    path('campaigns/<int:campaign_id>/resume/', views.resume_campaign_view, name='resume_campaign'),
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -0,0 +1,127 @@
+# multymessenger/validity.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+import logging
+import threading
+
+from .models import NumberValidity
+from .stats import update_statuses
+
+
+def get_validity_ttl():
+    """
+    Return how long a validity check stays trusted (`NUMBER_VALIDITY_TTL_DAYS`).
+    """
+    return timedelta(days=getattr(settings, "NUMBER_VALIDITY_TTL_DAYS", 30))
+
+
+class ValidityCache:
+    """
+    Two-level cache of WhatsApp registration checks, keyed by `phone_key`.
+
+    Lookups are answered from memory first; misses are fetched from the
+    `NumberValidity` table in a single query and kept in memory. Entries
+    older than the TTL are treated as unknown, so the number is tried again.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or get_validity_ttl()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, checked_at, now):
+        return now - checked_at < self.ttl
+
+    def lookup(self, phone_keys):
+        """
+        Return `{phone_key: is_valid}` for every key with a fresh check; unknown keys are left out.
+        """
+        now = timezone.now()
+        found, missing = {}, []
+        with self._lock:
+            for phone_key in set(phone_keys):
+                entry = self._entries.get(phone_key)
+                if entry and self._is_fresh(entry[1], now):
+                    found[phone_key] = entry[0]
+                elif phone_key:
+                    missing.append(phone_key)
+
+        if missing:
+            rows = NumberValidity.objects.filter(
+                phone_key__in=missing, checked_at__gt=now - self.ttl
+            ).values_list("phone_key", "is_valid", "checked_at")
+            with self._lock:
+                for phone_key, is_valid, checked_at in rows:
+                    self._entries[phone_key] = (is_valid, checked_at)
+                    found[phone_key] = is_valid
+        return found
+
+    def known_invalid(self, phone_keys):
+        """
+        Return the subset of `phone_keys` known not to be on WhatsApp.
+        """
+        return {phone_key for phone_key, is_valid in self.lookup(phone_keys).items() if not is_valid}
+
+    def record(self, results):
+        """
+        Store `{phone_key: is_valid}` check results in memory and upsert them into the table.
+        """
+        results = {phone_key: is_valid for phone_key, is_valid in results.items() if phone_key}
+        if not results:
+            return
+        now = timezone.now()
+        with self._lock:
+            for phone_key, is_valid in results.items():
+                self._entries[phone_key] = (is_valid, now)
+        try:
+            NumberValidity.objects.bulk_create(
+                [
+                    NumberValidity(phone_key=phone_key, is_valid=is_valid, checked_at=now)
+                    for phone_key, is_valid in results.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["phone_key"],
+                update_fields=["is_valid", "checked_at"],
+            )
+        except Exception as e:
+            logging.error(f"Error saving validity for {len(results)} number(s): {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_validity_cache():
+    """
+    Return the process-wide validity cache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ValidityCache()
+        return _cache
+
+
+def skip_known_invalid(recipients, current_status=None):
+    """
+    Drop recipients whose number is known to be invalid and mark their rows
+    failed right away, without any browser work. Returns the recipients left to send.
+    With `current_status`, only rows still in that status are failed, so rows
+    another process has moved on in the meantime are left alone.
+    """
+    invalid = get_validity_cache().known_invalid(recipient.phone_key for recipient in recipients)
+    if not invalid:
+        return recipients
+
+    skipped = [recipient.id for recipient in recipients if recipient.phone_key in invalid]
+    update_statuses(skipped, "failed", "no", current_status=current_status)
+    logging.info(f"Skipped {len(skipped)} contact(s) with numbers known to be invalid.")
+    return [recipient for recipient in recipients if recipient.phone_key not in invalid]
@@ -2,213 +2,44 @@
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from .forms import MessageForm, ExcelUploadForm
-from .models import MultyMessenger
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from seleniumbase import Driver
-
-import time
+from .models import Campaign, MultyMessenger
+from .campaigns import campaign_progress, recent_campaigns, resume_campaign
+from .reporting import DEFAULT_PAGE_SIZE, InvalidCursor, message_history
+from .stats import status_totals
+from .metrics import CONTENT_TYPE, render_metrics
+from .timing import step_summaries
+from .importer import get_batch_size, import_contact_chunks, import_contact_file, import_contacts
+
+import asyncio
+import json
 import logging
-import os
-import platform
+import time
 
 # Configure logging for better debugging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def get_chrome_driver_path():
-    """
-    Automatically detects the Google Chrome path based on the operating system.
-    """
-    system_platform = platform.system().lower()
-
-    chrome_paths = {
-        "windows": [
-            os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
-            os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
-        ],
-        "darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
-        "linux": [
-            "/usr/bin/google-chrome",
-            "/usr/bin/chromium-browser",  # For Chromium
-            "/opt/google/chrome/chrome",
-        ],
-    }
-
-    for path in chrome_paths.get(system_platform, []):
-        if os.path.exists(path):
-            return path
-
-    raise FileNotFoundError("Google Chrome not found on your system.")
-
-
-def update_message_status(contact_num, status):
-    """
-    Update the message status and contact number validity in the database.
-    """
-    try:
-        messenger_entry = MultyMessenger.objects.filter(contact_num=contact_num, message_status="pending").first()
-        if messenger_entry:
-            messenger_entry.message_status = "sent" if status == "Success" else "failed"
-            messenger_entry.contact_num_valid = "yes" if status == "Success" else "no"
-            messenger_entry.save()
-    except Exception as e:
-        logging.error(f"Error updating status for {contact_num}: {e}")
-
-
-def initialize_webdriver():
-    """
-    Initialize the Selenium WebDriver with Chrome options.
-    """
-    options = Options()
-    options.add_argument("--start-maximized")
-    options.add_argument("--disable-notifications")
-    options.add_argument("--disable-popup-blocking")
-    # options.add_argument("--headless")  # Headless mode
-    options.add_argument("--no-sandbox")  # Needed for some Linux environments
-    options.add_argument("--disable-dev-shm-usage")
-    # options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--enable-logging")
-    options.add_argument("--v=1")
-
-    try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver = Driver(browser="chrome")
-        return driver
-    except Exception as e:
-        logging.error(f"Failed to initialize WebDriver: {e}")
-        raise
-
-
-def send_whatsapp_message(contact_nums, message):
-    """
-    Automate sending WhatsApp messages using Selenium WebDriver.
-    """
-    driver = None  # Ensure driver is defined even if initialization fails
-
-    try:
-        driver = initialize_webdriver()
-        driver.get("https://web.whatsapp.com")
-        logging.info("Please scan the QR Code in the browser to log in to WhatsApp.")
-
-        # Wait for QR code scanning
-        WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, '//*[@id="pane-side"]'))
-        )
-        logging.info("WhatsApp Web successfully logged in.")
-    except Exception as e:
-        logging.error(f"Error during WhatsApp Web login: {e}")
-        if driver:  # Check if driver was initialized before attempting to quit
-            driver.quit()
-        raise Exception("Failed to log in to WhatsApp Web. Please try again.")
-
-    results = []
-
-    try:
-        for contact_num in contact_nums:
-            try:
-                # Open chat with the given phone number
-                whatsapp_url = f"https://web.whatsapp.com/send?phone={contact_num}&text={message}"
-                driver.get(whatsapp_url)
-                time.sleep(5)
-
-                # Handle "Invalid URL" alert if present
-                try:
-                    WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.XPATH, '//div[contains(@data-testid, "alert")]'))
-                    )
-                    alert_ok_button = driver.find_element(By.XPATH, '//button[contains(text(), "OK")]')
-                    alert_ok_button.click()
-                    logging.warning(f"Invalid URL for contact: {contact_num}")
-                    results.append((contact_num, "Invalid URL, skipped"))
-                    continue
-                except Exception:
-                    pass  # No alert found, proceed
-
-                # Locate the input box and send the message
-                input_box_xpath = '//*[@id="main"]/footer/div[1]/div/span/div/div[2]/div[1]/div[2]/div[1]/p'
-                input_box = WebDriverWait(driver, 10).until(
-                    EC.visibility_of_element_located((By.XPATH, input_box_xpath))
-                )
-                input_box.send_keys(Keys.ENTER)  # Press Enter to send
-                time.sleep(2)
-                results.append((contact_num, "Success"))
-                logging.info(f"Message sent successfully to {contact_num}.")
-            except Exception as e:
-                logging.error(f"Failed to send message to {contact_num}: {e}")
-                results.append((contact_num, f"Failed: {str(e)}"))
-
-    except Exception as e:
-        logging.error(f"Unexpected error during message sending: {e}")
-    finally:
-        if driver:  # Check if driver exists before quitting
-            driver.quit()
-        logging.info("WebDriver session ended.")
-
-    # Update message statuses in the database
-    for contact_num, status in results:
-        update_message_status(contact_num, status)
-
-    return results
-
-
-def generate_unique_id():
-    """
-    Generate a unique ID for each message based on the last record in the database.
-    """
-    last_record = MultyMessenger.objects.last()
-    if last_record:
-        try:
-            last_id = int(last_record.unique_id.split('_')[1])  # Extract numeric part
-            return f"MuM_{last_id + 1}"  # Increment the number
-        except (IndexError, ValueError):
-            return "MuM_100"  # Default ID if parsing fails
-    return "MuM_100"  # Default ID if no records exist
-
-
 def home(request):
     contact_nums_str = ""  # Initialize the string for contact numbers
-    first_names = []
-    last_names = []
 
     if request.method == 'POST':
         if 'file-upload' in request.FILES:
             # Process the uploaded file
             file = request.FILES['file-upload']
             try:
-                df = pd.read_excel(file)
-                # Extract first names, last names, and phone numbers
-                first_names = df['f_name'].dropna().astype(str).tolist()
-                last_names = df['l_name'].dropna().astype(str).tolist()
-                contact_nums = df['phone'].dropna().astype(str).tolist()
-
-                # Prepare for pre-filling the form
-                contact_nums_str = ','.join(contact_nums)
-                messages.success(request, "File uploaded successfully!")
-
-                # Save all contacts as new entries in the database
-                for i, contact_num in enumerate(contact_nums):
-                    unique_id = generate_unique_id()
-                    f_name = first_names[i] if i < len(first_names) else None
-                    l_name = last_names[i] if i < len(last_names) else None
+                # Stream the rows straight into the database; numbers repeated in the sheet are saved once
+                rejected = []
+                created, _ = import_contact_file(file, skip_existing=False, rejected=rejected)
+                messages.success(request, f"File uploaded successfully! {created} contact(s) saved.")
+                if rejected:
+                    rows = ', '.join(str(row) for row, _, _ in rejected[:20])
+                    more = '...' if len(rejected) > 20 else ''
+                    messages.warning(request, f"{len(rejected)} row(s) rejected for missing or invalid phone numbers (rows {rows}{more}).")
 
-                    # Always create a new record for each contact
-                    MultyMessenger.objects.create(
-                        unique_id=unique_id,
-                        contact_num=contact_num,
-                        # message='',  # No message during file upload
-                        f_name=f_name,
-                        l_name=l_name
-                    )
                 return redirect('home')  # Redirect after processing the file
 
             except Exception as e:
@@ -219,36 +50,24 @@ def home(request):
             if form.is_valid():
                 contact_nums = form.cleaned_data['contact_num']
                 message = form.cleaned_data['message']
-                f_name = form.cleaned_data['f_name']
-                l_name = form.cleaned_data['l_name']
-
-                # Create a new record for every message sent
-                for contact_num in contact_nums:
-                    unique_id = generate_unique_id()
-                    f_name = f_name  # Names not provided during message submission
-                    l_name = l_name
-
-                    MultyMessenger.objects.create(
-                        unique_id=unique_id,
-                        contact_num=contact_num,
-                        message=message,
-                        f_name=f_name,
-                        l_name=l_name
+                # Names typed into the form only make sense for a single recipient; everyone
+                # else gets the name uploaded with their number, if any
+                f_name = form.cleaned_data['f_name'] if len(contact_nums) == 1 else None
+                l_name = form.cleaned_data['l_name'] if len(contact_nums) == 1 else None
+
+                # Store the message once and create a pending record for every recipient,
+                # leaving out repeated and recently messaged numbers
+                with transaction.atomic():
+                    campaign = Campaign.objects.create(message=message)
+                    queued, skipped = import_contacts(
+                        [(contact_num, f_name or None, l_name or None) for contact_num in contact_nums],
+                        skip_existing=False, campaign=campaign,
                     )
 
-                # Send WhatsApp messages
-                try:
-                    results = send_whatsapp_message(contact_nums, message)
-                except Exception as e:
-                    messages.error(request, f"Error sending messages: {e}")
-                    return redirect('home')
-
-                # Display results
-                for contact_num, status in results:
-                    if status == "Success":
-                        messages.success(request, f"Message sent to {contact_num}.")
-                    else:
-                        messages.error(request, f"Failed to send message to {contact_num}: {status}")
+                # Rows are left pending; the `process_message_queue` worker sends them
+                messages.success(request, f"Queued {queued} message(s) for sending.")
+                if skipped:
+                    messages.warning(request, f"Skipped {skipped} duplicate or recently messaged number(s).")
 
                 return redirect('home')  # Clear the form after submission
     else:
@@ -259,55 +78,184 @@ def home(request):
     return render(request, 'multymessenger/home.html', {
         'form': form,
         'excel_form': excel_form,
-        'contact_nums_str': contact_nums_str
+        'contact_nums_str': contact_nums_str,
+        'campaigns': recent_campaigns(),
     })
 
-def file_upload_endpoint(request):
+def resume_campaign_view(request, campaign_id):
     """
-    Handle the file upload and process the Excel file to extract phone numbers.
-    Ensure that each phone number has at most 15 characters.
+    Requeue an interrupted campaign; the queue worker picks up its remaining rows.
     """
-    if request.method == 'POST' and request.FILES.get('file-upload'):
-        file = request.FILES['file-upload']
+    if request.method == 'POST':
         try:
-            # Read the uploaded Excel file
-            df = pd.read_excel(file)
-            print(df.head())  # Debugging: Check the file content
+            queued = resume_campaign(campaign_id)
+            messages.success(request, f"Campaign {campaign_id} resumed, {queued} message(s) queued.")
+        except Campaign.DoesNotExist:
+            messages.error(request, f"Campaign {campaign_id} does not exist.")
+    return redirect('home')
 
-            # Extract phone numbers and names
-            contact_nums = df['phone'].dropna().astype(str).tolist()
-            f_names = df['f_name'].dropna().astype(str).tolist()
-            l_names = df['l_name'].dropna().astype(str).tolist()
+def _report_filters(request):
+    """
+    Read the history filters shared by the reporting page and API from the query string.
+    """
+    campaign = request.GET.get('campaign')
+    return {
+        'cursor': request.GET.get('cursor') or None,
+        'limit': int(request.GET.get('limit') or DEFAULT_PAGE_SIZE),
+        'campaign_id': int(campaign) if campaign else None,
+        'message_status': request.GET.get('status') or None,
+    }
 
-            print(contact_nums, f_names, l_names)  # Debugging: Check extracted values
+def reports(request):
+    """
+    Sent-history page: totals from the aggregate counters, the per-step send
+    timings and a keyset-paginated list of recipients.
+    """
+    try:
+        filters = _report_filters(request)
+        rows, next_cursor = message_history(**filters)
+    except (ValueError, InvalidCursor) as e:
+        messages.error(request, f"Invalid report filter: {e}")
+        return redirect('reports')
+
+    totals = status_totals(filters['campaign_id'])
+    return render(request, 'multymessenger/reports.html', {
+        'totals': [
+            {'message_status': status, 'contact_num_valid': valid, 'count': count}
+            for (status, valid), count in sorted(totals.items())
+        ],
+        'timings': step_summaries(filters['campaign_id']),
+        'campaigns': recent_campaigns(limit=20),
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'status_choices': MultyMessenger.STATUS_CHOICES,
+    })
 
-            # Ensure phone numbers have at most 15 characters
-            contact_nums = [num[:15] for num in contact_nums]  # Truncate to 15 characters if longer
+def reports_api(request):
+    """
+    JSON version of the reporting page. Pass `next_cursor` back as `cursor` to get the next page.
+    """
+    try:
+        filters = _report_filters(request)
+        rows, next_cursor = message_history(**filters)
+    except (ValueError, InvalidCursor) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'counts': [
+            {'message_status': status, 'contact_num_valid': valid, 'count': count}
+            for (status, valid), count in sorted(status_totals(filters['campaign_id']).items())
+        ],
+        'timings': [
+            {key: summary[key] for key in ('step', 'count', 'total', 'mean', 'max', 'p50', 'p95')}
+            for summary in step_summaries(filters['campaign_id'])
+        ],
+        'results': [
+            {
+                'unique_id': row.unique_id,
+                'campaign': row.campaign_id,
+                'contact_num': row.contact_num,
+                'f_name': row.f_name,
+                'l_name': row.l_name,
+                'date_sent': row.date_sent.isoformat(),
+                'message_status': row.message_status,
+                'contact_num_valid': row.contact_num_valid,
+            }
+            for row in rows
+        ],
+        'next_cursor': next_cursor,
+    })
 
-            # Save to database
-            for i, contact_num in enumerate(contact_nums):
-                f_name = f_names[i] if i < len(f_names) else None
-                l_name = l_names[i] if i < len(l_names) else None
+def _import_upload(file):
+    """
+    Stream an uploaded Excel or CSV file into the database in batches.
+    Returns `(contact_nums, created, duplicates, rejected)`.
+    """
+    contact_nums = {}  # Ordered set: a number listed twice pre-fills the form once
+    rejected = []
 
-                # Check if this contact number already exists in the database
-                if not MultyMessenger.objects.filter(contact_num=contact_num).exists():
-                    # Debugging output before saving
-                    print(f"Saving: {contact_num}, {f_name}, {l_name}")
-                    
-                    # Create a new MultyMessenger instance
-                    MultyMessenger.objects.create(
-                        unique_id=generate_unique_id(),  # Ensure you have a function to generate unique IDs
-                        contact_num=contact_num,
-                        f_name=f_name,
-                        l_name=l_name
-                    )
-                else:
-                    print(f"Duplicate entry found for contact number: {contact_num}")
+    def collected(chunks):
+        # Remember the normalised numbers to pre-fill the form
+        for chunk in chunks:
+            contact_nums.update(dict.fromkeys(num for num, _, _ in chunk))
+            yield chunk
+
+    from .spreadsheets import iter_contact_chunks  # Loads pandas/openpyxl on first upload only
 
-            return JsonResponse({'contact_nums': contact_nums, 'f_names': f_names, 'l_names': l_names}) 
-        
-        except Exception as e:
-            print(f"Error processing file: {e}") 
-            return JsonResponse({'error': f"Error processing file: {e}"}, status=400)
+    # Stream the uploaded sheet into the database in batches, skipping numbers that already exist
+    created, duplicates = import_contact_chunks(
+        collected(iter_contact_chunks(file, get_batch_size(), rejected=rejected))
+    )
+    return list(contact_nums), created, duplicates, rejected
+
+async def file_upload_endpoint(request):
+    """
+    Handle the file upload and stream the Excel or CSV file to extract phone numbers.
+    Numbers are normalised to E.164; rows without a valid number are reported back.
+    Parsing and saving run in a worker thread so the event loop stays free.
+    """
+    if request.method == 'POST':
+        files = await sync_to_async(lambda: request.FILES)()
+        file = files.get('file-upload')
+        if file:
+            try:
+                contact_nums, created, duplicates, rejected = await sync_to_async(_import_upload)(file)
+                logging.info(f"Upload {file.name}: saved {created} contact(s), {duplicates} duplicate(s) skipped, {len(rejected)} row(s) rejected")
+
+                return JsonResponse({
+                    'contact_nums': contact_nums,
+                    'created': created,
+                    'duplicates': duplicates,
+                    'rejected': [{'row': row, 'value': value, 'reason': reason} for row, value, reason in rejected],
+                })
+
+            except Exception as e:
+                logging.exception(f"Error processing uploaded file {file.name}: {e}")
+                return JsonResponse({'error': f"Error processing file: {e}"}, status=400)
 
     return JsonResponse({'error': 'No file uploaded'}, status=400)
+
+async def campaign_progress_stream(request, campaign_id):
+    """
+    Stream a campaign's per-status recipient counts as Server-Sent Events.
+    An event is sent whenever the counts change. The stream ends with a
+    `done` event once nothing is pending, queued or sending any more, or once
+    the counts have not changed for `PROGRESS_STREAM_IDLE_TIMEOUT` seconds, so
+    rows left `sending` (unconfirmed) by a dead browser or a stopped worker
+    never keep a stream open.
+    """
+    if not await Campaign.objects.filter(id=campaign_id).aexists():
+        return JsonResponse({'error': f"Campaign {campaign_id} does not exist."}, status=404)
+
+    interval = getattr(settings, 'PROGRESS_STREAM_INTERVAL', 2)
+    idle_timeout = getattr(settings, 'PROGRESS_STREAM_IDLE_TIMEOUT', 60)
+
+    async def events():
+        last = None
+        changed_at = time.monotonic()
+        while True:
+            progress = await sync_to_async(campaign_progress)(campaign_id)
+            if progress != last:
+                yield f"data: {json.dumps(progress)}\n\n"
+                last = progress
+                changed_at = time.monotonic()
+            else:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            finished = not any(progress[status] for status in ('pending', 'queued', 'sending'))
+            if finished or time.monotonic() - changed_at >= idle_timeout:
+                yield "event: done\ndata: {}\n\n"
+                return
+            await asyncio.sleep(interval)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint: send-step timing histograms and recipient counts.
+    """
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
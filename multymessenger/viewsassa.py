@@ -2,7 +2,9 @@
 
 from django.shortcuts import render, redirect
 from .forms import MessageForm, ExcelUploadForm
-from .models import MultyMessenger
+from .models import Campaign, MultyMessenger
+from .ids import generate_unique_id
+from .phones import normalize_phone_number
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -12,20 +14,6 @@ import time
 import pandas as pd
 from django.http import JsonResponse
 
-# Function to generate unique ID
-def generate_unique_id():
-    last_record = MultyMessenger.objects.last()
-    if last_record:
-        try:
-            last_id = int(last_record.unique_id.split('_')[1])  # Extract the number from the unique_id
-            new_id = f"MuM_{last_id + 1}"  # Increment the last number and create the new ID
-        except (IndexError, ValueError):
-            new_id = "MuM_100"
-    else:
-        new_id = "MuM_100"
-    
-    return new_id
-
 # Function to send WhatsApp message
 def send_whatsapp_message(contact_nums, message):
     driver = webdriver.Chrome()  # Adjust path if necessary
@@ -59,10 +47,8 @@ def send_whatsapp_message(contact_nums, message):
 
 # Function to prepend the country code
 def add_country_code(contact_num):
-    # Add "+91" to the contact number if it doesn't already start with it
-    if not contact_num.startswith("+91"):
-        return "+91" + contact_num
-    return contact_num
+    # Normalise to E.164, adding the default country code to national numbers
+    return normalize_phone_number(contact_num, default_country_code="91") or contact_num
 
 def home(request):
     contact_nums_str = ""  # Initialize an empty string for the contact numbers
@@ -92,8 +78,7 @@ def home(request):
                         unique_id=unique_id,
                         contact_num=row['phone'],
                         f_name=row['f_name'],
-                        l_name=row['l_name'],
-                        message="",  # You can leave this blank if the message is sent later
+                        l_name=row['l_name'],  # No campaign until a message is sent
                     )
 
                 # Fill the contact_num field with the extracted phone numbers
@@ -113,13 +98,14 @@ def home(request):
                 # Add the country code "+91" to each contact number
                 contact_nums = [add_country_code(num) for num in contact_nums]
 
-                # Save each contact and message in the database
+                # Save the message once on a campaign and each contact against it
+                campaign = Campaign.objects.create(message=message)
                 for contact_num in contact_nums:
                     unique_id = generate_unique_id()
                     MultyMessenger.objects.create(
                         unique_id=unique_id,
                         contact_num=contact_num,
-                        message=message
+                        campaign=campaign,
                     )
 
                 # Send the messages
@@ -4,29 +4,17 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.http import JsonResponse
 from .forms import MessageForm, ExcelUploadForm
-from .models import MultyMessenger
+from .models import Campaign, MultyMessenger
+from .ids import generate_unique_id
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from .chromedriver import resolve_chrome_binaries
 from selenium.webdriver.chrome.options import Options
 import time
 import pandas as pd
 
-def generate_unique_id():
-    """
-    Generate a unique ID for each message based on the last record in the database.
-    """
-    last_record = MultyMessenger.objects.last()
-    if last_record:
-        try:
-            last_id = int(last_record.unique_id.split('_')[1])  # Extract numeric part
-            return f"MuM_{last_id + 1}"  # Increment the number
-        except (IndexError, ValueError):
-            return "MuM_100"  # Default ID if parsing fails
-    return "MuM_100"  # Default ID if no records exist
-
 def open_whatsapp_in_new_tab(driver):
     """
     Open WhatsApp Web in a new browser tab using JavaScript.
@@ -57,8 +45,8 @@ def send_whatsapp_message(contact_nums, message):
     options.add_argument("--disable-gpu"); #applicable to windows os only
     options.add_argument("--disable-dev-shm-usage"); # overcome limited resource problems
 
-    # Initialize the driver with ChromeDriverManager
-    service = Service(ChromeDriverManager().install())  # Automatically manage ChromeDriver
+    # Initialize the driver with the chromedriver pinned at startup
+    service = Service(resolve_chrome_binaries().driver_path)
     driver = webdriver.Chrome(service=service, options=chrome_options)  # Create the driver
 
     # Open WhatsApp in a new tab
@@ -153,6 +141,9 @@ def home(request):
                 f_name = form.cleaned_data['f_name']
                 l_name = form.cleaned_data['l_name']
 
+                # The message is stored once on the campaign, not on every row
+                campaign = Campaign.objects.create(message=message)
+
                 # Create a new record for every message sent
                 for contact_num in contact_nums:
                     unique_id = generate_unique_id()
@@ -162,7 +153,7 @@ def home(request):
                     MultyMessenger.objects.create(
                         unique_id=unique_id,
                         contact_num=contact_num,
-                        message=message,
+                        campaign=campaign,
                         f_name=f_name,
                         l_name=l_name
                     )
@@ -233,7 +224,6 @@ def file_upload_endpoint(request):
                         contact_num=contact_num,
                         f_name=f_name,
                         l_name=l_name,
-                        message=message
                     )
                 else:
                     print(f"Duplicate entry found for contact number: {contact_num}")
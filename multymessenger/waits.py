@@ -0,0 +1,108 @@
+# multymessenger/waits.py
+
+from django.conf import settings
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Locators for the states a chat can settle into after navigation
+COMPOSE_BOX_XPATH = '//*[@id="main"]/footer/div[1]/div/span/div/div[2]/div[1]/div[2]/div[1]/p'
+INVALID_NUMBER_XPATH = '//div[contains(@data-testid, "alert")]'
+ALERT_OK_XPATH = '//button[contains(text(), "OK")]'
+OUTGOING_MESSAGE_XPATH = '//*[@id="main"]//div[contains(@class, "message-out")]'
+SENT_TICK_XPATH = './/span[@data-icon="msg-check" or @data-icon="msg-dblcheck"]'
+
+# Locators of the app's own "New chat" search, used to open chats without reloading
+NEW_CHAT_BUTTON_XPATH = '//*[@title="New chat" or @aria-label="New chat"]'
+CHAT_SEARCH_BOX_XPATH = '//div[@contenteditable="true"][@data-tab="3"]'
+# Result row showing the searched number, whatever spaces or dashes it is formatted with
+CHAT_SEARCH_RESULT_XPATH = '//*[@role="listitem"][contains(translate(normalize-space(), " +-()", ""), "{digits}")]'
+CHAT_SEARCH_EMPTY_XPATH = (
+    '//*[contains(text(), "No results found") or contains(text(), "No chats, contacts or messages found")]'
+)
+
+CHAT_READY = "ready"
+CHAT_INVALID = "invalid"
+
+DEFAULT_TIMEOUTS = {
+    "chat_open": 20,  # Compose box or invalid-number dialog after opening a chat
+    "in_page_open": 5,  # Each step of the in-app chat search before falling back to a reload
+    "send_confirm": 15,  # Tick on the new outgoing message after pressing Enter
+}
+POLL_FREQUENCY = 0.2
+
+
+def get_timeout(step):
+    """
+    Return the configured timeout in seconds for a step of the send loop.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **getattr(settings, "WHATSAPP_TIMEOUTS", {})}
+    return timeouts[step]
+
+
+def first_visible(locators):
+    """
+    Expected condition resolving to `(name, element)` for the first locator
+    in `locators` that has a visible element, or False while none does.
+    """
+    def condition(driver):
+        for name, locator in locators.items():
+            for element in driver.find_elements(*locator):
+                if element.is_displayed():
+                    return name, element
+        return False
+    return condition
+
+
+def wait_for_chat(driver, timeout=None):
+    """
+    Wait until an opened chat is either ready to send or shows the
+    invalid-number dialog, whichever happens first.
+    Returns `(CHAT_READY, compose_box)` or `(CHAT_INVALID, dialog)`.
+    """
+    timeout = get_timeout("chat_open") if timeout is None else timeout
+    wait = WebDriverWait(
+        driver, timeout, poll_frequency=POLL_FREQUENCY,
+        ignored_exceptions=(StaleElementReferenceException,),
+    )
+    return wait.until(first_visible({
+        CHAT_READY: (By.XPATH, COMPOSE_BOX_XPATH),
+        CHAT_INVALID: (By.XPATH, INVALID_NUMBER_XPATH),
+    }))
+
+
+def dismiss_invalid_number_dialog(driver):
+    """
+    Close the invalid-number dialog so the next chat can be opened.
+    """
+    driver.find_element(By.XPATH, ALERT_OK_XPATH).click()
+
+
+def count_outgoing_messages(driver):
+    """
+    Return the number of outgoing message bubbles rendered in the open chat.
+    """
+    return len(driver.find_elements(By.XPATH, OUTGOING_MESSAGE_XPATH))
+
+
+def wait_for_sent_tick(driver, previous_count, timeout=None):
+    """
+    Wait until a new outgoing message has rendered with a sent/delivered tick.
+    Raises TimeoutException if the message never leaves the clock state.
+    """
+    timeout = get_timeout("send_confirm") if timeout is None else timeout
+
+    def condition(driver):
+        bubbles = driver.find_elements(By.XPATH, OUTGOING_MESSAGE_XPATH)
+        if len(bubbles) <= previous_count:
+            return False
+        return bool(bubbles[-1].find_elements(By.XPATH, SENT_TICK_XPATH))
+
+    wait = WebDriverWait(
+        driver, timeout, poll_frequency=POLL_FREQUENCY,
+        ignored_exceptions=(StaleElementReferenceException,),
+    )
+    try:
+        return wait.until(condition)
+    except TimeoutException:
+        raise TimeoutException("Message was not confirmed as sent.")